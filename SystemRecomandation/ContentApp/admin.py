@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from ContentApp.models import Content, Category, Favorite, Rating, CategoryContent
+from ContentApp.models import Content, Category, Favorite, Rating, CategoryContent, UserRecommendation
 
 # Register your models here.
 
@@ -8,6 +8,7 @@ admin.site.register(Category)
 admin.site.register(Favorite)
 admin.site.register(Rating)
 admin.site.register(CategoryContent)
+admin.site.register(UserRecommendation)
 
 @admin.register(Content)
 class ContentAdmin(admin.ModelAdmin):
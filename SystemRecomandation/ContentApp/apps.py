@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContentappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ContentApp'
+
+    def ready(self):
+        # Подключаем обработчики сигналов
+        from ContentApp import signals  # noqa: F401
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ContentApp.services.data_get import ContentService
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет денормализованные агрегаты с исходными таблицами: счетчики оценок и избранного "
+        "товаров с Rating/Favorite и CategoryVoteTally с CategoryContent, исправляет расхождения "
+        "(например, после bulk-загрузки данных без сигналов) и пересчитывает popularity_score"
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        fixed_contents = ContentService.reconcile_content_aggregates()
+        fixed_tallies = ContentService.reconcile_category_tallies()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Агрегаты сверены за {time.perf_counter() - start:.1f} с, исправлено "
+            f"товаров: {fixed_contents}, итогов голосов за категории: {fixed_tallies}"
+        ))
@@ -0,0 +1,91 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ContentApp.utils.recommendation_updater import RecommendationUpdater
+from ContentApp.utils.similarity_updater import SimilarityUpdater
+
+
+class Command(BaseCommand):
+    help = (
+        "Фоновый воркер переобучения рекомендательной модели: следит за изменениями "
+        "Favorite/Rating/CategoryContent и публикует новую версию модели, когда "
+        "накопилось достаточно изменений или модель устарела"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=int, default=settings.RECOMMENDATION_RETRAIN_THRESHOLD,
+            help="Сколько изменений запускают переобучение",
+        )
+        parser.add_argument(
+            '--max-age', type=int, default=settings.RECOMMENDATION_RETRAIN_MAX_AGE,
+            help="Максимальный возраст модели в секундах",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=settings.RECOMMENDATION_RETRAIN_INTERVAL,
+            help="Пауза между проверками в секундах",
+        )
+        parser.add_argument(
+            '--backend', default=settings.RECOMMENDATION_BACKEND,
+            help="Движок рекомендаций из реестра (keras, als)",
+        )
+        parser.add_argument('--epochs', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=32)
+        parser.add_argument('--once', action='store_true', help="Выполнить одну проверку и выйти")
+        parser.add_argument('--force', action='store_true', help="Переобучить без проверки изменений")
+
+    def handle(self, *args, **options):
+        force = options['force']
+
+        while True:
+            if force:
+                needed, reason = True, 'принудительный запуск'
+                force = False
+            else:
+                needed, reason = RecommendationUpdater.needs_rebuild(
+                    threshold=options['threshold'],
+                    max_age=options['max_age'],
+                )
+
+            if needed:
+                self.stdout.write(f"🔄 Переобучение модели ({reason})...")
+                try:
+                    version = RecommendationUpdater.rebuild_model(
+                        epochs=options['epochs'],
+                        batch_size=options['batch_size'],
+                        backend=options['backend'],
+                    )
+                    self.stdout.write(self.style.SUCCESS(f"✅ Опубликована модель версии {version}"))
+
+                    total = RecommendationUpdater.materialize_recommendations()
+                    self.stdout.write(f"Сохранено рекомендаций пользователям: {total}")
+
+                    total = SimilarityUpdater.materialize_similar_content()
+                    self.stdout.write(f"Сохранено похожих товаров: {total}")
+                except Exception as e:
+                    self.stderr.write(f"❌ Ошибка переобучения: {e}")
+            else:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"Переобучение не требуется ({reason})")
+                if SimilarityUpdater.is_enabled():
+                    self.apply_similarity_changes()
+
+            if options['once']:
+                break
+
+            time.sleep(options['interval'])
+
+    def apply_similarity_changes(self):
+        """Изменения товаров с прошлой проверки - одной правкой индекса похожих товаров"""
+        try:
+            version, saved, deleted = SimilarityUpdater.apply_changes()
+        except Exception as e:
+            self.stderr.write(f"❌ Ошибка обновления похожих товаров: {e}")
+            return
+
+        if version is not None:
+            self.stdout.write(
+                f"Похожие товары обновлены в версии {version}: изменено {saved}, удалено {deleted}"
+            )
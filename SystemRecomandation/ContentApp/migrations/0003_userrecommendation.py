@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContentApp', '0002_categorycontent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField(verbose_name='Позиция в выдаче')),
+                ('score', models.FloatField(verbose_name='Оценка модели')),
+                ('model_version', models.CharField(max_length=32, verbose_name='Версия модели')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Время расчета')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ContentApp.content', verbose_name='Товар')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация пользователю',
+                'verbose_name_plural': 'Рекомендации пользователям',
+                'ordering': ['user', 'rank'],
+                'unique_together': {('user', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContentApp', '0003_userrecommendation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['-created_at', '-id'], name='content_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    Content = apps.get_model('ContentApp', 'Content')
+    Rating = apps.get_model('ContentApp', 'Rating')
+
+    per_content = Rating.objects.filter(content=OuterRef('pk')).order_by().values('content')
+    Content.objects.update(
+        rating_count=Coalesce(Subquery(per_content.annotate(c=Count('id')).values('c')), 0),
+        rating_sum=Coalesce(Subquery(per_content.annotate(s=Sum('rating')).values('s')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContentApp', '0004_content_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
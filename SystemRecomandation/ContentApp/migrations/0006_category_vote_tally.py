@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_category_tallies(apps, schema_editor):
+    CategoryContent = apps.get_model('ContentApp', 'CategoryContent')
+    CategoryVoteTally = apps.get_model('ContentApp', 'CategoryVoteTally')
+
+    rows = CategoryContent.objects.values('content_id', 'category_id').annotate(
+        vote_sum=Sum('vote'), voter_count=Count('id')
+    ).order_by()
+    CategoryVoteTally.objects.bulk_create(
+        (CategoryVoteTally(**row) for row in rows.iterator()), batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContentApp', '0005_content_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryVoteTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vote_sum', models.IntegerField(default=0, verbose_name='Сумма голосов')),
+                ('voter_count', models.PositiveIntegerField(default=0, verbose_name='Количество голосовавших')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ContentApp.category', verbose_name='Категория')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_tallies', to='ContentApp.content', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Итог голосов за категорию',
+                'verbose_name_plural': 'Итоги голосов за категории',
+                'unique_together': {('content', 'category')},
+            },
+        ),
+        migrations.RunPython(fill_category_tallies, migrations.RunPython.noop),
+    ]
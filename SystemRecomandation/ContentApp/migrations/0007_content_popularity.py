@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Ln, NullIf
+
+
+def fill_popularity(apps, schema_editor):
+    Content = apps.get_model('ContentApp', 'Content')
+    Favorite = apps.get_model('ContentApp', 'Favorite')
+
+    favorites = Favorite.objects.filter(content=OuterRef('pk')).order_by().values('content')
+    Content.objects.update(
+        favorite_count=Coalesce(Subquery(favorites.annotate(c=Count('id')).values('c')), 0)
+    )
+
+    # Та же формула, что ContentsService.popularity_score на момент миграции
+    prior_weight = settings.POPULARITY_PRIOR_WEIGHT
+    bayesian_average = (
+        Value(prior_weight * settings.POPULARITY_PRIOR_RATING) + F('rating_sum')
+    ) * 1.0 / NullIf(Value(prior_weight) + F('rating_count'), 0)
+    favorites_bonus = Value(settings.POPULARITY_FAVORITE_WEIGHT) * Ln(F('favorite_count') + 1.0)
+    Content.objects.update(popularity_score=ExpressionWrapper(
+        Coalesce(bayesian_average, Value(0.0)) + favorites_bonus, output_field=FloatField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContentApp', '0006_category_vote_tally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['-popularity_score', '-id'], name='content_popularity_idx'),
+        ),
+        migrations.RunPython(fill_popularity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContentApp', '0007_content_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Близость')),
+                ('rank', models.PositiveIntegerField(verbose_name='Позиция в выдаче')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_items', to='ContentApp.content', verbose_name='Товар')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='ContentApp.content', verbose_name='Похожий товар')),
+            ],
+            options={
+                'verbose_name': 'Похожий товар',
+                'verbose_name_plural': 'Похожие товары',
+                'ordering': ['content', 'rank'],
+                'unique_together': {('content', 'rank')},
+            },
+        ),
+    ]
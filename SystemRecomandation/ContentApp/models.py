@@ -65,14 +65,47 @@ class Content(models.Model):
         blank=False,
         upload_to='content_images/%Y/%m/%d/',
     )
+    # Денормализованные агрегаты оценок: поддерживаются сигналами Rating,
+    # расхождения исправляет manage.py reconcile_aggregates
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество оценок",
+    )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Сумма оценок",
+    )
+    # Поддерживается сигналами Favorite так же, как агрегаты оценок
+    favorite_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В избранном",
+    )
+    # Байесовское среднее оценок с поправкой на избранное, см. ContentsService.popularity_score
+    popularity_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Популярность",
+    )
 
 
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset-пагинация каталога по (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='content_created_id_idx'),
+            # Топ популярных товаров читается по индексу, без сортировки всей таблицы
+            models.Index(fields=['-popularity_score', '-id'], name='content_popularity_idx'),
+        ]
 
 
+    # Поля, которые save() не перезаписывает у существующих товаров
+    _DENORMALIZED_FIELDS = ('rating_count', 'rating_sum', 'favorite_count', 'popularity_score')
+
     def save(self, *args, **kwargs):
         # Генерируем slug только для новых объектов или если slug пустой
         if not self.slug:
@@ -100,9 +133,24 @@ class Content(models.Model):
 
             self.slug = base_slug
 
+        # Агрегаты пишут только сигналы через F()-UPDATE и reconcile_aggregates:
+        # обычное сохранение загруженного объекта затерло бы их устаревшими значениями
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self._DENORMALIZED_FIELDS
+            ]
+
         super().save(*args, **kwargs)
 
 
+    @property
+    def avg_rating(self):
+        """Средняя оценка без запроса к Rating, None если оценок нет"""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
     def delete(self, *args, **kwargs):
         self._delete_image_file()
         super().delete(*args, **kwargs)
@@ -160,6 +208,34 @@ class CategoryContent(models.Model):
         return f"{self.user.username} - {self.content.title} - {self.category.name} ({vote_display})"
 
 
+class CategoryVoteTally(models.Model):
+    """
+    Итоги голосов CategoryContent по паре (товар, категория). Обновляются сигналами
+    при каждом голосе, расхождения исправляет команда reconcile_aggregates.
+    """
+    content = models.ForeignKey(
+        'Content',
+        on_delete=models.CASCADE,
+        verbose_name="Товар",
+        related_name='category_tallies'
+    )
+    category = models.ForeignKey(
+        'Category',
+        on_delete=models.CASCADE,
+        verbose_name="Категория"
+    )
+    vote_sum = models.IntegerField(default=0, verbose_name="Сумма голосов")
+    voter_count = models.PositiveIntegerField(default=0, verbose_name="Количество голосовавших")
+
+    class Meta:
+        verbose_name = "Итог голосов за категорию"
+        verbose_name_plural = "Итоги голосов за категории"
+        unique_together = ['content', 'category']
+
+    def __str__(self):
+        return f"{self.content_id} - {self.category_id}: {self.vote_sum} ({self.voter_count})"
+
+
 class Category(models.Model):
     name = models.CharField(
         max_length=255,
@@ -271,3 +347,73 @@ class Favorite(models.Model):
         return f"{self.user.username} - {self.content.title} - favorite"
 
 
+class UserRecommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+        related_name='recommendations'
+    )
+    rank = models.PositiveIntegerField(
+        verbose_name="Позиция в выдаче"
+    )
+    content = models.ForeignKey(
+        Content,
+        on_delete=models.CASCADE,
+        verbose_name="Товар",
+        related_name='+'
+    )
+    score = models.FloatField(
+        verbose_name="Оценка модели"
+    )
+    model_version = models.CharField(
+        max_length=32,
+        verbose_name="Версия модели"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Время расчета"
+    )
+
+    class Meta:
+        verbose_name = "Рекомендация пользователю"
+        verbose_name_plural = "Рекомендации пользователям"
+        ordering = ['user', 'rank']
+        unique_together = ['user', 'rank']  # Индекс (user, rank) обслуживает выдачу одним запросом
+
+    def __str__(self):
+        return f"{self.user.username} - {self.rank} - {self.content.title}"
+
+
+class SimilarContent(models.Model):
+    """
+    Предрассчитанные похожие товары: заполняются из индекса похожих товаров
+    последней модели (SimilarityUpdater) и читаются страницами одним запросом
+    """
+    content = models.ForeignKey(
+        Content,
+        on_delete=models.CASCADE,
+        verbose_name="Товар",
+        related_name='similar_items'
+    )
+    neighbour = models.ForeignKey(
+        Content,
+        on_delete=models.CASCADE,
+        verbose_name="Похожий товар",
+        related_name='neighbour_of'
+    )
+    score = models.FloatField(
+        verbose_name="Близость"
+    )
+    rank = models.PositiveIntegerField(
+        verbose_name="Позиция в выдаче"
+    )
+
+    class Meta:
+        verbose_name = "Похожий товар"
+        verbose_name_plural = "Похожие товары"
+        ordering = ['content', 'rank']
+        unique_together = ['content', 'rank']  # Индекс (content, rank) обслуживает выдачу одним запросом
+
+    def __str__(self):
+        return f"{self.content_id} - {self.rank} - {self.neighbour_id}"
@@ -73,10 +73,13 @@ class ContentSerializer(serializers.ModelSerializer):
         ]
 
     def get_avg_rating(self, obj):
-        from ContentApp.services.data_get import ContentService
-        return ContentService.get_content_rating(obj)
+        # Денормализованные столбцы товара, без запроса к Rating
+        return obj.avg_rating
 
     def get_is_favorite(self, obj):
+        if hasattr(obj, 'is_favorite'):
+            return obj.is_favorite
+
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.favorited_by.filter(user=request.user).exists()
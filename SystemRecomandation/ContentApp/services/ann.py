@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+
+class EmbeddingIndex:
+    """
+    Приближенный поиск ближайших соседей (IVF) по векторам товаров на NumPy.
+    Векторы разбиваются k-means на n_lists кластеров; запрос просматривает только
+    n_probe ближайших кластеров. Больше n_probe - выше полнота и дольше поиск.
+    """
+
+    def __init__(self, vectors, centroids, list_offsets, list_items):
+        # Нормированные векторы товаров, строки соответствуют позициям товаров в модели
+        self.vectors = vectors
+        self.centroids = centroids
+        # Товары кластера i: list_items[list_offsets[i]:list_offsets[i + 1]]
+        self.list_offsets = list_offsets
+        self.list_items = list_items
+
+    @property
+    def size(self):
+        return len(self.vectors)
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, iterations=10, seed=42):
+        """Строит индекс сферическим k-means по косинусной близости"""
+        vectors = cls._normalize(np.asarray(vectors, dtype=np.float32))
+        n = len(vectors)
+        n_lists = min(n_lists or settings.RECOMMENDATION_ANN_LISTS or int(np.sqrt(n)) or 1, n)
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Пустые кластеры переинициализируем случайными товарами
+            empty = counts == 0
+            sums[empty] = vectors[rng.choice(n, size=int(empty.sum()))]
+            centroids = cls._normalize(sums)
+
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        list_items = np.argsort(assignments, kind='stable').astype(np.int32)
+        list_offsets = np.searchsorted(assignments[list_items], np.arange(n_lists + 1)).astype(np.int64)
+
+        return cls(vectors, centroids, list_offsets, list_items)
+
+    def search(self, query, n_candidates=None, n_probe=None):
+        """Позиции до n_candidates товаров, ближайших к query, из n_probe ближайших кластеров"""
+        n_candidates = n_candidates or settings.RECOMMENDATION_ANN_CANDIDATES
+        n_probe = min(n_probe or settings.RECOMMENDATION_ANN_PROBES, len(self.centroids))
+
+        query = self._normalize(np.asarray(query, dtype=np.float32))
+
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        candidates = np.concatenate([
+            self.list_items[self.list_offsets[probe]:self.list_offsets[probe + 1]] for probe in probes
+        ])
+        if len(candidates) <= n_candidates:
+            return candidates
+
+        scores = self.vectors[candidates] @ query
+        best = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        return candidates[best]
+
+    def save(self, path):
+        path = Path(path)
+        np.save(path / 'ann_vectors.npy', self.vectors)
+        np.save(path / 'ann_centroids.npy', self.centroids)
+        np.save(path / 'ann_list_offsets.npy', self.list_offsets)
+        np.save(path / 'ann_list_items.npy', self.list_items)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        if not (path / 'ann_vectors.npy').exists():
+            return None
+        return cls(
+            np.load(path / 'ann_vectors.npy'),
+            np.load(path / 'ann_centroids.npy'),
+            np.load(path / 'ann_list_offsets.npy'),
+            np.load(path / 'ann_list_items.npy'),
+        )
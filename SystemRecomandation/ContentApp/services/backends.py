@@ -0,0 +1,95 @@
+from importlib import import_module
+
+from django.conf import settings
+
+from ContentApp.services.data_get import ContentsService
+
+
+# Модули со встроенными движками: регистрируются декоратором при импорте
+BUILTIN_BACKEND_MODULES = (
+    'ContentApp.services.recomendation',
+    'ContentApp.services.als',
+)
+
+_registry = {}
+
+
+def register_backend(name):
+    """Декоратор класса движка: делает его доступным по имени в settings.RECOMMENDATION_BACKEND"""
+    def decorator(cls):
+        cls.backend_name = name
+        _registry[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name=None):
+    """Класс движка по имени, по умолчанию settings.RECOMMENDATION_BACKEND"""
+    name = name or settings.RECOMMENDATION_BACKEND
+
+    if name not in _registry:
+        for module in BUILTIN_BACKEND_MODULES:
+            import_module(module)
+
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный движок рекомендаций: {name}") from None
+
+
+def available_backends():
+    for module in BUILTIN_BACKEND_MODULES:
+        import_module(module)
+    return sorted(_registry)
+
+
+class RecommendationBackend:
+    """
+    Интерфейс движка рекомендаций. Views, воркер переобучения и ModelStore
+    работают только через эти методы, поэтому движки взаимозаменяемы.
+    """
+    backend_name = None
+
+    def fit(self, **options):
+        """Обучает движок на текущих данных БД; ValueError, если данных недостаточно"""
+        raise NotImplementedError
+
+    def partial_update(self, saved=(), deleted=()):
+        """
+        Дешевое обновление без переобучения: saved - пары (content_id, текст товара),
+        deleted - id удаленных товаров
+        """
+        raise NotImplementedError
+
+    def recommend(self, user_id, top_n=10):
+        """(content_ids, scores) по убыванию оценки или None для неизвестного пользователя"""
+        raise NotImplementedError
+
+    def similar(self, content_id, top_n=10):
+        """(content_ids, scores) похожих товаров по убыванию близости"""
+        raise NotImplementedError
+
+    def save(self, path):
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path):
+        raise NotImplementedError
+
+    def recommend_for_user(self, user_id, top_n=10, user=None, identity_map=None):
+        recommended = self.recommend(user_id, top_n)
+        if recommended is None:
+            return self.get_population_content(top_n)
+
+        recommended_content_ids, _ = recommended
+        return ContentsService.rec_content(recommended_content_ids, user, identity_map)
+
+    def get_population_content(self, top_n=10):
+        return ContentsService.popular_content(top_n)
+
+    def get_simular_content(self, content_id, top_n=10, user=None, identity_map=None):
+        similar_content_ids, _ = self.similar(content_id, top_n)
+        if len(similar_content_ids) == 0:
+            return []
+
+        return ContentsService.rec_content(similar_content_ids, user, identity_map)
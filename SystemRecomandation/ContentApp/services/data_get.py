@@ -1,10 +1,23 @@
-from django.db.models import Sum, Avg, Count
+from array import array
 
-from ContentApp.services.django_setap import configure_django
-
-configure_django()
+from django.db.models import (
+    Sum, Count, Exists, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Value, Q,
+)
+from django.db.models.functions import Coalesce, Greatest, Ln, NullIf
+from django.conf import settings
 from django.contrib.auth.models import User
-from ContentApp.models import Content, Rating, CategoryContent, Favorite
+from django.db import IntegrityError, transaction
+from ContentApp.models import (
+    Content, Rating, CategoryContent, CategoryVoteTally, Favorite, UserRecommendation,
+)
+from ContentApp.utils.recommendation_cache import RecommendationCache
+
+
+# Средняя оценка из денормализованных столбцов Content (NULL, если оценок нет)
+AVERAGE_RATING = ExpressionWrapper(
+    F('rating_sum') * 1.0 / NullIf(F('rating_count'), 0),
+    output_field=FloatField(),
+)
 
 
 class ContentsService:
@@ -24,33 +37,243 @@ class ContentsService:
             return ContentsService.get_all_content()
         return Content.objects.filter(is_published=True, favorited_by__user=user).order_by('-created_at')
 
+    @staticmethod
+    def with_listing_data(contents, user: User):
+        """
+        Добавляет к товарам все, что выводит ContentSerializer, за постоянное число запросов:
+        флаг избранного - аннотацией, автора - JOIN, категории - одним prefetch.
+        Средний рейтинг читается из столбцов rating_sum/rating_count самого товара.
+        """
+        if user.is_authenticated:
+            is_favorite = Exists(Favorite.objects.filter(user=user, content=OuterRef('pk')))
+        else:
+            is_favorite = Value(False)
+
+        return contents.select_related('author').prefetch_related('category').annotate(
+            is_favorite=is_favorite,
+        )
+
     @staticmethod
     def get_content_per_user():
         return Favorite.objects.select_related('user', 'content')
 
     @staticmethod
-    def rec_content(per):
-        return Content.objects.filter(id__in=per)
+    def get_interactions():
+        """Избранное с оценкой пользователя, подтянутой тем же SQL-запросом"""
+        user_rating = Rating.objects.filter(
+            author_id=OuterRef('user_id'),
+            content_id=OuterRef('content_id'),
+        ).values('rating')[:1]
+
+        return Favorite.objects.annotate(
+            rating=Subquery(user_rating)
+        ).values_list('user_id', 'content_id', 'rating', 'created_at').order_by()
 
     @staticmethod
-    def popular_content(top_n):
-        try:
-            return Content.objects.annotate(
-                num_likes=Count('contentlike'),  # Исправлено: правильное имя связи
-                avg_rating=Avg('ratings__rating')  # Исправлено: правильное имя связи для рейтингов
-            ).order_by('-num_likes', '-avg_rating')[:top_n]
-        except Exception:
-            return Content.objects.annotate(
-                avg_rating=Avg('ratings__rating')
-            ).order_by('-avg_rating')[:top_n]
+    def get_implicit_feedback():
+        """
+        Неявные сигналы для ALS: пары (user_id, content_id) избранного,
+        тройки (user_id, content_id, rating) оценок и пары голосов за категории товара
+        """
+        favorites = Favorite.objects.values_list('user_id', 'content_id').order_by()
+        ratings = Rating.objects.values_list('author_id', 'content_id', 'rating').order_by()
+        votes = CategoryContent.objects.values_list('user_id', 'content_id').distinct().order_by()
+
+        return favorites, ratings, votes
+
+    @staticmethod
+    def get_ranked_recommendations(user_id, top_n):
+        """
+        Предрассчитанные рекомендации пользователя компактными массивами
+        (content_ids, scores) в порядке ранга - в таком виде они хранятся в кэше
+        """
+        rows = UserRecommendation.objects.filter(
+            user_id=user_id
+        ).order_by('rank').values_list('content_id', 'score')[:top_n]
+
+        content_ids, scores = array('q'), array('d')
+        for content_id, score in rows:
+            content_ids.append(content_id)
+            scores.append(score)
+        return content_ids, scores
+
+    @staticmethod
+    def get_cached_ranking(user_id, top_n):
+        """get_ranked_recommendations через RecommendationCache"""
+        return RecommendationCache.get_or_set(
+            user_id, f'ranking_{top_n}',
+            lambda: ContentsService.get_ranked_recommendations(user_id, top_n),
+        )
+
+    @staticmethod
+    def get_user_recommendations(user: User, top_n, identity_map=None):
+        """Предрассчитанные рекомендации пользователя в порядке ранга, ранжирование берется из кэша"""
+        content_ids, _ = ContentsService.get_cached_ranking(user.id, top_n)
+        return ContentsService.hydrate(content_ids, user, identity_map)
+
+    @staticmethod
+    def hydrate(content_ids, user=None, identity_map=None):
+        """
+        Товары по списку id в том же порядке (id__in порядок не сохраняет) одним
+        запросом с автором и категориями; с user - готовые для ContentSerializer.
+        identity_map - словарь content_id -> Content на время запроса: уже загруженные
+        другими источниками товары повторно не читаются. Отсутствующие id пропускаются.
+        """
+        identity_map = {} if identity_map is None else identity_map
+
+        missing = [content_id for content_id in content_ids if content_id not in identity_map]
+        if missing:
+            contents = Content.objects.filter(id__in=missing)
+            if user is not None:
+                contents = ContentsService.with_listing_data(contents, user)
+            else:
+                contents = contents.select_related('author').prefetch_related('category')
+            identity_map.update((content.id, content) for content in contents)
+
+        return [identity_map[content_id] for content_id in content_ids if content_id in identity_map]
+
+    @staticmethod
+    def get_similar_content(content_id, top_n, user=None):
+        """
+        Предрассчитанные похожие товары из SimilarContent в порядке ранга:
+        один запрос по индексу (content, rank) плюс prefetch категорий
+        """
+        contents = Content.objects.filter(neighbour_of__content_id=content_id, is_published=True)
+        if user is not None:
+            contents = ContentsService.with_listing_data(contents, user)
+        else:
+            contents = contents.select_related('author').prefetch_related('category')
+
+        return contents.order_by('neighbour_of__rank')[:top_n]
+
+    @staticmethod
+    def rec_content(per, user=None, identity_map=None):
+        return ContentsService.hydrate(per, user, identity_map)
+
+    @staticmethod
+    def get_content_features():
+        """Признаки всего каталога постолбцово за два запроса (без запросов на каждый товар)"""
+        rows = Content.objects.order_by('id').annotate(
+            rating=AVERAGE_RATING
+        ).values_list('id', 'title', 'summary', 'price', 'author__username', 'rating')
+
+        columns = ('id', 'title', 'summary', 'price', 'author', 'rating')
+        features = {column: list(values) for column, values in zip(columns, zip(*rows))}
+        if not features:
+            features = {column: [] for column in columns}
+
+        categories = ContentsService.get_content_categories()
+        features['categories'] = [categories.get(content_id, {}) for content_id in features['id']]
+
+        return features
+
+    @staticmethod
+    def get_content_categories(content_ids=None):
+        """
+        Нормированное распределение голосов по категориям для товаров content_ids
+        (для всех товаров, если None) одним запросом к итогам CategoryVoteTally
+        """
+        tallies = CategoryVoteTally.objects.all()
+        if content_ids is not None:
+            tallies = tallies.filter(content_id__in=list(content_ids))
+
+        # Неположительные суммы не входят в распределение (см. normalize_category_votes)
+        categories_data = tallies.filter(vote_sum__gt=0).values(
+            'content_id', 'category__name'
+        ).annotate(
+            category_vote_sum=F('vote_sum')
+        ).order_by()
+
+        votes_per_content = {}
+        for item in categories_data:
+            votes_per_content.setdefault(item['content_id'], []).append(item)
+
+        return {
+            content_id: ContentService.normalize_category_votes(items)
+            for content_id, items in votes_per_content.items()
+        }
+
+    @staticmethod
+    def popularity_score():
+        """
+        Выражение популярности над столбцами Content: байесовское среднее оценок
+        (товар с парой оценок не обгоняет товар с сотней чуть более низких) плюс
+        логарифм числа добавлений в избранное. Параметры - settings.POPULARITY_*.
+        """
+        prior_weight = settings.POPULARITY_PRIOR_WEIGHT
+        bayesian_average = (
+            Value(prior_weight * settings.POPULARITY_PRIOR_RATING) + F('rating_sum')
+        ) * 1.0 / NullIf(Value(prior_weight) + F('rating_count'), 0)
+        favorites = Value(settings.POPULARITY_FAVORITE_WEIGHT) * Ln(F('favorite_count') + 1.0)
+
+        return ExpressionWrapper(
+            Coalesce(bayesian_average, Value(0.0)) + favorites, output_field=FloatField()
+        )
+
+    @staticmethod
+    def popular_content(top_n, user=None):
+        """
+        Топ-N опубликованных товаров по popularity_score: чтение по индексу
+        content_popularity_idx. С user товары готовы для ContentSerializer.
+        """
+        contents = Content.objects.filter(is_published=True)
+        if user is not None:
+            contents = ContentsService.with_listing_data(contents, user)
+
+        return contents.order_by('-popularity_score', '-id')[:top_n]
 
 
 class ContentService:
     @staticmethod
     def get_content_rating(content: Content):
-        return Rating.objects.filter(
-        content=content
-    ).aggregate(avg_rating=Avg('rating'))['avg_rating']
+        return content.avg_rating
+
+    @staticmethod
+    def apply_rating_change(content_id, count_delta, sum_delta):
+        """Атомарно сдвигает rating_count/rating_sum товара F-выражениями и обновляет популярность"""
+        # Greatest защищает от отрицательных значений, если агрегаты уже разошлись
+        # (например, после bulk_create без сигналов) - их исправит reconcile_aggregates
+        contents = Content.objects.filter(pk=content_id)
+        contents.update(
+            rating_count=Greatest(F('rating_count') + count_delta, 0),
+            rating_sum=Greatest(F('rating_sum') + sum_delta, 0),
+        )
+        contents.update(popularity_score=ContentsService.popularity_score())
+
+    @staticmethod
+    def apply_favorite_change(content_id, delta):
+        """Атомарно сдвигает favorite_count товара и обновляет популярность"""
+        contents = Content.objects.filter(pk=content_id)
+        contents.update(favorite_count=Greatest(F('favorite_count') + delta, 0))
+        contents.update(popularity_score=ContentsService.popularity_score())
+
+    @staticmethod
+    def reconcile_content_aggregates():
+        """
+        Пересчитывает rating_count/rating_sum/favorite_count по таблицам Rating и Favorite
+        и заново считает popularity_score всех товаров (на случай смены settings.POPULARITY_*).
+        Возвращает число товаров с разошедшимися счетчиками.
+        """
+        ratings = Rating.objects.filter(content=OuterRef('pk')).order_by().values('content')
+        favorites = Favorite.objects.filter(content=OuterRef('pk')).order_by().values('content')
+        actual = {
+            'rating_count': Coalesce(Subquery(ratings.annotate(c=Count('id')).values('c')), 0),
+            'rating_sum': Coalesce(Subquery(ratings.annotate(s=Sum('rating')).values('s')), 0),
+            'favorite_count': Coalesce(Subquery(favorites.annotate(c=Count('id')).values('c')), 0),
+        }
+
+        drift = Q()
+        for field in actual:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+        drifted = Content.objects.alias(
+            **{f'actual_{field}': expression for field, expression in actual.items()}
+        ).filter(drift)
+
+        with transaction.atomic():
+            fixed = drifted.update(**actual)
+            Content.objects.update(popularity_score=ContentsService.popularity_score())
+
+        return fixed
 
     @staticmethod
     def get_rating(user: User, content: Content):
@@ -59,14 +282,65 @@ class ContentService:
 
     @staticmethod
     def get_real_content_category(content: Content):
-        categories_data = CategoryContent.objects.filter(
-            content=content
-        ).values(
-            'category__name', 'category__id'
-        ).annotate(
-            category_vote_sum=Sum('vote')
-        )
+        return ContentsService.get_content_categories([content.id]).get(content.id, {})
+
+    @staticmethod
+    def apply_category_vote_change(content_id, category_id, voter_delta, vote_delta):
+        """Сдвигает итог голосов пары (товар, категория) одним UPDATE, создавая строку при первом голосе"""
+        tallies = CategoryVoteTally.objects.filter(content_id=content_id, category_id=category_id)
+        changes = {
+            'vote_sum': F('vote_sum') + vote_delta,
+            'voter_count': Greatest(F('voter_count') + voter_delta, 0),
+        }
+        if tallies.update(**changes) or voter_delta <= 0:
+            return
 
+        try:
+            with transaction.atomic():
+                CategoryVoteTally.objects.create(
+                    content_id=content_id, category_id=category_id,
+                    vote_sum=vote_delta, voter_count=voter_delta,
+                )
+        except IntegrityError:
+            # Строку успел создать параллельный голос
+            tallies.update(**changes)
+
+    @staticmethod
+    def reconcile_category_tallies():
+        """Пересчитывает CategoryVoteTally по голосам CategoryContent, возвращает число исправленных строк"""
+        actual = {
+            (content_id, category_id): (vote_sum, voter_count)
+            for content_id, category_id, vote_sum, voter_count in CategoryContent.objects.values(
+                'content_id', 'category_id'
+            ).annotate(
+                vote_sum=Sum('vote'), voter_count=Count('id')
+            ).values_list('content_id', 'category_id', 'vote_sum', 'voter_count').order_by().iterator()
+        }
+
+        to_update, to_delete = [], []
+        for tally in CategoryVoteTally.objects.only('id', 'content_id', 'category_id', 'vote_sum', 'voter_count'):
+            expected = actual.pop((tally.content_id, tally.category_id), None)
+            if expected is None:
+                to_delete.append(tally.id)
+            elif expected != (tally.vote_sum, tally.voter_count):
+                tally.vote_sum, tally.voter_count = expected
+                to_update.append(tally)
+
+        to_create = [
+            CategoryVoteTally(content_id=content_id, category_id=category_id,
+                              vote_sum=vote_sum, voter_count=voter_count)
+            for (content_id, category_id), (vote_sum, voter_count) in actual.items()
+        ]
+
+        with transaction.atomic():
+            CategoryVoteTally.objects.filter(id__in=to_delete).delete()
+            CategoryVoteTally.objects.bulk_update(to_update, ['vote_sum', 'voter_count'], batch_size=1000)
+            CategoryVoteTally.objects.bulk_create(to_create, batch_size=5000)
+
+        return len(to_update) + len(to_delete) + len(to_create)
+
+    @staticmethod
+    def normalize_category_votes(categories_data):
         if not categories_data:
             return {}
 
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from ContentApp.models import Content, Favorite
+from ContentApp.services.data_get import ContentsService
+from ContentApp.services.model_store import ModelStore
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_scoring_executor():
+    """Пул потоков для скоринга моделью: numpy/TensorFlow не блокируют цикл событий"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.FEED_SCORING_THREADS, thread_name_prefix='feed-scoring'
+                )
+    return _executor
+
+
+async def run_in_scoring_thread(func, *args):
+    """
+    func(*args) в пуле скоринга, а не в единственном sync-потоке запроса.
+    Соединения с БД у потоков пула свои; закрываются по CONN_MAX_AGE, как у запросов.
+    """
+    def call():
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_scoring_executor(), call)
+
+
+class FeedService:
+    """
+    Асинхронная сборка ленты из независимых источников: персональные рекомендации,
+    популярное и похожие на последнее избранное. Источники выполняются конкурентно,
+    каждый под своим таймаутом из settings.FEED_SOURCE_TIMEOUTS; упавший или
+    не успевший источник возвращает None, и вызывающий подставляет запасной вариант.
+    Все товары одного запроса проходят через общий identity map.
+
+    Параллельны только ранжирование и скоринг моделью (run_in_scoring_thread).
+    Запросы async ORM (популярное, похожие, загрузка товаров) Django выполняет
+    по очереди в одном sync-потоке запроса. Таймаут отменяет только ожидание:
+    начатый запрос к БД продолжает работать, и медленный запрос одного источника
+    задерживает запросы источников, стоящих за ним в очереди.
+    """
+
+    @staticmethod
+    async def hydrate(content_ids, user, identity_map):
+        """Асинхронный вариант ContentsService.hydrate: товары в порядке content_ids"""
+        missing = [content_id for content_id in content_ids if content_id not in identity_map]
+        if missing:
+            contents = ContentsService.with_listing_data(Content.objects.filter(id__in=missing), user)
+            async for content in contents:
+                identity_map[content.id] = content
+
+        return [identity_map[content_id] for content_id in content_ids if content_id in identity_map]
+
+    @staticmethod
+    async def score_with_model(user_id, top_n):
+        """Рекомендации моделью на лету в пуле потоков, для пользователей вне пакетного расчета"""
+        def score():
+            engine = ModelStore().get_engine()
+            if engine is None:
+                return None
+
+            recommended = engine.recommend(user_id, top_n)
+            return None if recommended is None else [int(content_id) for content_id in recommended[0]]
+
+        return await run_in_scoring_thread(score)
+
+    @staticmethod
+    async def personal(user, top_n, identity_map):
+        if not user.is_authenticated:
+            return None
+
+        # Ранжирование из кэша (при промахе - запрос к UserRecommendation) не занимает sync-поток
+        content_ids, _ = await run_in_scoring_thread(ContentsService.get_cached_ranking, user.id, top_n)
+        if not content_ids:
+            content_ids = await FeedService.score_with_model(user.id, top_n)
+        if not content_ids:
+            return None
+
+        return await FeedService.hydrate(content_ids, user, identity_map)
+
+    @staticmethod
+    async def popular(user, top_n, identity_map):
+        contents = [content async for content in ContentsService.popular_content(top_n, user)]
+        for content in contents:
+            identity_map.setdefault(content.id, content)
+        return contents
+
+    @staticmethod
+    async def similar(user, top_n, identity_map):
+        """Похожие на последний добавленный в избранное товар"""
+        if not user.is_authenticated:
+            return []
+
+        seed_id = await Favorite.objects.filter(user=user).order_by('-created_at').values_list(
+            'content_id', flat=True
+        ).afirst()
+        if seed_id is None:
+            return []
+
+        contents = [content async for content in ContentsService.get_similar_content(seed_id, top_n, user)]
+        for content in contents:
+            identity_map.setdefault(content.id, content)
+        return contents
+
+    @staticmethod
+    async def run_source(name, source, *args):
+        """
+        Источник под таймаутом: None вместо результата при ошибке или превышении времени.
+        Уже запущенный в потоке вызов (ORM, скоринг) таймаут не прерывает, см. FeedService.
+        """
+        try:
+            return await asyncio.wait_for(source(*args), settings.FEED_SOURCE_TIMEOUTS[name])
+        except asyncio.TimeoutError:
+            print(f"⏱ Источник ленты '{name}' не уложился в таймаут, используется запасной вариант")
+        except Exception as e:
+            print(f"Ошибка источника ленты '{name}': {e}")
+        return None
+
+    @staticmethod
+    async def gather(user, sources, top_n):
+        """
+        Запускает источники из sources конкурентно. Возвращает (результаты по имени,
+        имена источников, замененных запасным вариантом): персональные рекомендации
+        заменяются популярным, остальные - пустым списком.
+        """
+        identity_map = {}
+        results = await asyncio.gather(*(
+            FeedService.run_source(name, getattr(FeedService, name), user, top_n, identity_map)
+            for name in sources
+        ))
+        results = dict(zip(sources, results))
+
+        fallbacks = [name for name, result in results.items() if result is None]
+        if 'personal' in fallbacks:
+            results['personal'] = results.get('popular') or []
+        for name in fallbacks:
+            if results[name] is None:
+                results[name] = []
+
+        return results, fallbacks
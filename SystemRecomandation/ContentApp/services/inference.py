@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import numpy as np
+
+
+class NumpyScorer:
+    """
+    Прямой проход обученной Keras-модели RecommendationEngine на чистом NumPy:
+    эмбеддинги пользователя и товара -> Dense(relu) -> Dense(relu) -> Dense(sigmoid).
+    Веб-процессам для выдачи рекомендаций не нужен TensorFlow.
+    """
+    DENSE_LAYERS = ('hidden_1', 'hidden_2', 'output')
+
+    def __init__(self, user_embeddings, content_embeddings, weights, biases):
+        self.user_embeddings = user_embeddings
+        self.content_embeddings = content_embeddings
+        self.weights = weights
+        self.biases = biases
+
+    @classmethod
+    def from_keras(cls, model):
+        """Экспортирует веса обученной модели в массивы NumPy"""
+        weights, biases = [], []
+        for name in cls.DENSE_LAYERS:
+            kernel, bias = model.get_layer(name).get_weights()
+            weights.append(kernel.astype(np.float32))
+            biases.append(bias.astype(np.float32))
+
+        return cls(
+            model.get_layer('user_embedding').get_weights()[0].astype(np.float32),
+            model.get_layer('content_embedding').get_weights()[0].astype(np.float32),
+            weights,
+            biases,
+        )
+
+    def predict(self, user_indices, content_indices):
+        """Оценки для пар (user_indices[i], content_indices[i]), как model.predict(...).flatten()"""
+        embedding_size = self.user_embeddings.shape[1]
+        first_kernel = self.weights[0]
+
+        # concat(u, c) @ W == u @ W[:d] + c @ W[d:], без копирования конкатенации
+        hidden = (
+            self.user_embeddings[user_indices] @ first_kernel[:embedding_size]
+            + self.content_embeddings[content_indices] @ first_kernel[embedding_size:]
+            + self.biases[0]
+        )
+        hidden = np.maximum(hidden, 0)
+
+        hidden = np.maximum(hidden @ self.weights[1] + self.biases[1], 0)
+
+        logits = hidden @ self.weights[2] + self.biases[2]
+        return (1.0 / (1.0 + np.exp(-logits))).ravel()
+
+    def save(self, path):
+        path = Path(path)
+        np.save(path / 'user_embeddings.npy', self.user_embeddings)
+        np.save(path / 'content_embeddings.npy', self.content_embeddings)
+        for i, (kernel, bias) in enumerate(zip(self.weights, self.biases)):
+            np.save(path / f'dense_{i}_kernel.npy', kernel)
+            np.save(path / f'dense_{i}_bias.npy', bias)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        layers = range(len(cls.DENSE_LAYERS))
+        return cls(
+            np.load(path / 'user_embeddings.npy'),
+            np.load(path / 'content_embeddings.npy'),
+            [np.load(path / f'dense_{i}_kernel.npy') for i in layers],
+            [np.load(path / f'dense_{i}_bias.npy') for i in layers],
+        )
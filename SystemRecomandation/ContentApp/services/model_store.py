@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+from django.conf import settings
+from django.utils import timezone
+
+from ContentApp.services.backends import get_backend
+from ContentApp.services.recomendation import RecommendationEngine
+from ContentApp.services.similarity import SimilarityIndex
+
+
+class ModelStore:
+    """Хранилище версионированных снимков обученных движков рекомендаций на диске"""
+    LATEST_FILE = 'LATEST'
+    META_FILE = 'meta.json'
+    LOCK_FILE = '.lock'
+    # Снимки, опубликованные до появления реестра движков
+    DEFAULT_BACKEND = 'keras'
+
+    _lock = threading.Lock()
+    _loaded_version = None
+    _loaded_engine = None
+
+    def __init__(self, root=None, keep=None):
+        self.root = Path(root or settings.RECOMMENDATION_MODEL_DIR)
+        self.keep = keep or settings.RECOMMENDATION_MODEL_KEEP
+
+    def publish(self, engine, **meta):
+        """Сохраняет обученный движок как новую версию и делает ее текущей"""
+        version, tmp_path = self._new_version()
+
+        engine.save(tmp_path)
+        meta['backend'] = engine.backend_name
+
+        with self.locked():
+            return self._commit_version(version, tmp_path, meta)
+
+    def update_similarity(self, update):
+        """
+        Применяет update(engine, meta) к индексу похожих товаров последней версии и
+        публикует результат как новую версию; update может дополнить meta новой
+        версии, а если он вернул False, версия не публикуется. engine содержит только
+        индекс и TF-IDF - этого достаточно для partial_update; остальные файлы снимка
+        не копируются, а связываются жесткими ссылками.
+
+        Чтение последней версии, правка и публикация выполняются под блокировкой
+        хранилища, поэтому одновременная публикация или другая правка не теряются.
+        Каждая правка - новый снимок, и все веб-процессы перезагружают движок,
+        поэтому правки копятся и применяются пачкой (SimilarityUpdater.apply_changes
+        в воркере переобучения), а не на каждое сохранение товара.
+        """
+        import joblib
+
+        with self.locked():
+            base_version = self.latest_version()
+            if base_version is None:
+                return None
+
+            base_path = self.root / base_version
+            # Индекс похожих товаров у всех движков общий - из RecommendationEngine
+            engine = RecommendationEngine()
+            engine.similarity_index = SimilarityIndex.load(base_path)
+            engine.tfidf_vectorizer = joblib.load(base_path / 'tfidf.joblib')
+
+            meta = self.get_meta(base_version) or {}
+            if update(engine, meta) is False:
+                return None
+
+            version, tmp_path = self._new_version()
+            tmp_path.mkdir()
+            for file in base_path.iterdir():
+                if file.name.startswith('similarity_') or file.name == self.META_FILE:
+                    continue
+                try:
+                    os.link(file, tmp_path / file.name)
+                except OSError:
+                    shutil.copy2(file, tmp_path / file.name)
+            engine.similarity_index.save(tmp_path)
+
+            meta['patched_from'] = base_version
+
+            return self._commit_version(version, tmp_path, meta)
+
+    @contextmanager
+    def locked(self):
+        """Эксклюзивная блокировка хранилища между процессами на время публикации версии"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / self.LOCK_FILE, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                # Windows: msvcrt.locking сам повторяет попытку только 10 секунд
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def latest_version(self):
+        try:
+            return (self.root / self.LATEST_FILE).read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith('.')
+        )
+
+    def get_meta(self, version=None):
+        version = version or self.latest_version()
+        if version is None:
+            return None
+        try:
+            with open(self.root / version / self.META_FILE, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None):
+        """Загружает указанную (по умолчанию последнюю) версию движка"""
+        version = version or self.latest_version()
+        if version is None:
+            return None
+
+        meta = self.get_meta(version) or {}
+        backend = get_backend(meta.get('backend', self.DEFAULT_BACKEND))
+        return backend.load(self.root / version)
+
+    def get_engine(self):
+        """Движок для выдачи рекомендаций: последняя версия, загруженная один раз на процесс"""
+        version = self.latest_version()
+        if version is None:
+            return None
+
+        cls = type(self)
+        if cls._loaded_version == version:
+            return cls._loaded_engine
+
+        with cls._lock:
+            if cls._loaded_version != version:
+                cls._loaded_engine = self.load(version)
+                cls._loaded_version = version
+
+        return cls._loaded_engine
+
+    def prune(self):
+        """Удаляет старые версии, оставляя последние self.keep"""
+        latest = self.latest_version()
+        for version in self.versions()[:-self.keep]:
+            if version != latest:
+                shutil.rmtree(self.root / version, ignore_errors=True)
+
+    def _new_version(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        return version, self.root / f'.tmp-{version}-{os.getpid()}'
+
+    def _commit_version(self, version, tmp_path, meta):
+        meta.update({
+            'version': version,
+            'created_at': timezone.now().isoformat(),
+        })
+        with open(tmp_path / self.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        # Каталог версии появляется целиком, а указатель переключается атомарно,
+        # поэтому веб-процессы никогда не видят недописанный снимок
+        os.replace(tmp_path, self.root / version)
+        self._write_latest(version)
+        self.prune()
+
+        return version
+
+    def _write_latest(self, version):
+        tmp_file = self.root / f'.{self.LATEST_FILE}-{os.getpid()}'
+        tmp_file.write_text(version, encoding='utf-8')
+        os.replace(tmp_file, self.root / self.LATEST_FILE)
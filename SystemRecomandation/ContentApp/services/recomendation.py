@@ -1,84 +1,92 @@
+from pathlib import Path
 from pprint import pprint
 
 import numpy as np
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, Embedding, Flatten, Dense, Concatenate
-from tensorflow.keras.optimizers import Adam
+
+if __name__ == "__main__":
+    # Запуск отдельным скриптом (python -m ContentApp.services.recomendation):
+    # Django настраивается до импорта моделей
+    from ContentApp.services.django_setap import configure_django
+    configure_django()
+
+from django.conf import settings
 from django.db.models import Count, Avg
-from ContentApp.services.data_get import ContentsService, ContentService
-from django.utils import timezone
+from ContentApp.services.backends import RecommendationBackend, register_backend
+from ContentApp.services.data_get import ContentsService
+from ContentApp.services.matrix_builder import UserItemMatrixBuilder
+from ContentApp.services.similarity import SimilarityIndex
+from ContentApp.services.ann import EmbeddingIndex
+from ContentApp.services.inference import NumpyScorer
 
 
-class RecommendationEngine:
+@register_backend('keras')
+class RecommendationEngine(RecommendationBackend):
     def __init__(self):
-        self.content_similarity_matrix = None
+        self.similarity_index = None
         self.user_item_matrix = None
         self.deep_model = None
+        self.scorer = None
         self.content_features = None
         self.user_features = None
+        self.tfidf_vectorizer = None
+        self.user_ids = None
+        self.item_ids = None
+        self.embedding_index = None
+        self._user_positions = None
+
+
+    def fit(self, epochs=5, batch_size=32, **options):
+        self.get_default_recommendations()
+        self.prepare_user_item_matrix()
+
+        if self.user_item_matrix is None or len(self.user_ids) == 0:
+            raise ValueError("Недостаточно данных для обучения модели")
 
+        self.train_deep_model(epochs=epochs, batch_size=batch_size)
+
+    def partial_update(self, saved=(), deleted=()):
+        """Правит индекс похожих товаров уже обученным TF-IDF (тот же словарь и idf)"""
+        for content_id, text in saved:
+            self.similarity_index.upsert(content_id, self.tfidf_vectorizer.transform([text]))
+        for content_id in deleted:
+            self.similarity_index.remove(content_id)
 
     def get_default_recommendations(self):
-        contents = ContentsService.get_all_content()
-        content_data = []
-
-        for content in contents:
-            rating_avg = ContentService.get_content_rating(content)
-            categories = ContentService.get_real_content_category(content)
-            content_data.append(
-                {
-                    'id': content.id,
-                    'title': content.title,
-                    'summary': content.summary,
-                    'categories': categories,
-                    'price': content.price,
-                    'rating': rating_avg,
-                    'author': content.author.username,
-                }
-            )
-
-        df = pd.DataFrame(content_data)
+        # pandas и scikit-learn нужны только при обучении, веб-процессы их не загружают
+        import pandas as pd
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        df = pd.DataFrame(ContentsService.get_content_features())
 
         df['content_features'] = df['title'] + ' ' + df['summary'] + ' ' + df['author']
 
         tfidf = TfidfVectorizer(stop_words='english')
         tfidf_matrix = tfidf.fit_transform(df['content_features'])
 
-        self.content_similarity_matrix = cosine_similarity(tfidf_matrix)
+        self.tfidf_vectorizer = tfidf
+        self.similarity_index = SimilarityIndex.build(df['id'].to_numpy(), tfidf_matrix)
         self.content_features = df.set_index('id')['rating'].to_dict()
 
 
+    @staticmethod
+    def content_text(title, summary, author):
+        """Текст товара для TF-IDF, в том же виде, что и в get_default_recommendations"""
+        return f"{title} {summary} {author}"
+
+
     def prepare_user_item_matrix(self):
-        interactions = ContentsService.get_content_per_user()
-
-        data = []
-        for interaction in interactions:
-            rating = ContentService.get_rating(user=interaction.user, content=interaction.content)
-            data.append({
-                'user_id': interaction.user.id,
-                'content_id': interaction.content.id,
-                'rating': rating if rating else 5,
-                'created_at': interaction.created_at,
-            })
-
-        df = pd.DataFrame(data)
-
-        df['weighted_rating'] = (
-            df['rating'] * 0.6 +
-            (timezone.now() - df['created_at']).dt.days * 0.2
-        )
+        matrix, user_ids, item_ids = UserItemMatrixBuilder.build()
 
-        self.user_item_matrix = df.pivot_table(
-            index='user_id',
-            columns='content_id',
-            values='weighted_rating',
-            fill_value=0,
-        )
+        self.user_item_matrix = matrix
+        self.user_ids = user_ids.tolist()
+        self.item_ids = item_ids.tolist()
 
     def build_deep_learning_model(self, num_users, num_contents, embedding_size=50):
+        # TensorFlow нужен только для обучения, веб-процессы используют NumpyScorer
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.layers import Input, Embedding, Flatten, Dense, Concatenate
+        from tensorflow.keras.optimizers import Adam
+
         user_input = Input(shape=(1,), name='user_input')
         content_input = Input(shape=(1,), name='content_input')
 
@@ -90,9 +98,9 @@ class RecommendationEngine:
 
 
         concat = Concatenate()([user_vec, content_vec])
-        dense1 = Dense(128, activation='relu')(concat)
-        dense2 = Dense(64, activation='relu')(dense1)
-        output = Dense(1, activation='sigmoid')(dense2)
+        dense1 = Dense(128, activation='relu', name='hidden_1')(concat)
+        dense2 = Dense(64, activation='relu', name='hidden_2')(dense1)
+        output = Dense(1, activation='sigmoid', name='output')(dense2)
 
         self.deep_model = Model(inputs=[user_input, content_input], outputs=output)
         self.deep_model.compile(optimizer=Adam(0.001), loss='mse')
@@ -101,34 +109,21 @@ class RecommendationEngine:
 
     def train_deep_model(self, epochs=10, batch_size=64):
         if (self.user_item_matrix is None or
-            self.user_item_matrix.empty or
+            self.user_item_matrix.nnz == 0 or
             self.content_features is None):
             raise ValueError("user_item_matrix - пуст или content_features - пуст")
 
-        user_ids = []
-        content_ids = []
-        ratings = []
-
-        for user_idx, user_id in enumerate(self.user_item_matrix.index):
-            for content_idx, content_id in enumerate(self.user_item_matrix.columns):
-                rating = self.user_item_matrix.iloc[user_idx, content_idx]
-                if rating > 0:
-                    user_ids.append(user_idx)
-                    content_ids.append(content_idx)
-                    ratings.append(rating)
+        user_ids, content_ids, ratings = UserItemMatrixBuilder.training_triples(self.user_item_matrix)
 
-        if not user_ids:
+        if len(user_ids) == 0:
             raise ValueError("НЕТУ ДАННЫХ")
 
-        ratings = np.array(ratings) / 10
-
-
-        user_ids = np.array(user_ids)
-        content_ids = np.array(content_ids)
+        ratings = ratings / 10
 
+        num_users, num_contents = self.user_item_matrix.shape
         self.build_deep_learning_model(
-            num_users=len(self.user_item_matrix.index),
-            num_contents=len(self.user_item_matrix.columns),
+            num_users=num_users,
+            num_contents=num_contents,
         )
 
         history = self.deep_model.fit(
@@ -140,58 +135,136 @@ class RecommendationEngine:
             verbose=1,
         )
 
+        self.scorer = NumpyScorer.from_keras(self.deep_model)
+        self.build_embedding_index()
+
         return history
 
-    def recommend_for_user(self, user_id, top_n=10):
-        if (self.deep_model is None
-            or self.user_item_matrix is None
-            or self.content_similarity_matrix is None):
+    def build_embedding_index(self):
+        """ANN-индекс по обученным эмбеддингам товаров для отбора кандидатов"""
+        self.embedding_index = EmbeddingIndex.build(self.scorer.content_embeddings)
+
+    def _user_position(self, user_id):
+        if self._user_positions is None:
+            self._user_positions = {uid: i for i, uid in enumerate(self.user_ids)}
+        return self._user_positions.get(user_id)
+
+    def _candidate_items(self, user_idx):
+        """
+        Позиции товаров для точного скоринга моделью. Для большого каталога это
+        несколько сотен ближайших в пространстве эмбеддингов к товарам пользователя,
+        иначе - весь каталог.
+        """
+        num_contents = len(self.item_ids)
+        if (self.embedding_index is None
+                or self.user_item_matrix is None
+                or num_contents <= settings.RECOMMENDATION_ANN_CANDIDATES):
+            return np.arange(num_contents)
+
+        row = self.user_item_matrix.getrow(user_idx)
+        if row.nnz == 0:
+            return np.arange(num_contents)
+
+        # Запрос - взвешенный центр эмбеддингов товаров, с которыми взаимодействовал пользователь
+        query = row.data @ self.embedding_index.vectors[row.indices]
+        return self.embedding_index.search(query)
+
+    def recommend(self, user_id, top_n=10):
+        """Возвращает (content_ids, scores) по убыванию оценки или None для неизвестного пользователя"""
+        if (self.scorer is None
+            or self.user_ids is None
+            or self.similarity_index is None):
             raise ValueError("Модель не тренировалась или нету данных")
 
-        try:
-            user_idx = list(self.user_item_matrix.index).index(user_id)
-        except ValueError:
-            return self.get_population_content(top_n)
+        user_idx = self._user_position(user_id)
+        if user_idx is None:
+            return None
 
-        all_content_ids = list(self.user_item_matrix.columns)
+        all_content_ids = self.item_ids
 
-        user_indices = np.array([user_idx] * len(all_content_ids))
-        content_indices = np.array([list(self.user_item_matrix.columns).index(cid) for cid in all_content_ids])
+        content_indices = self._candidate_items(user_idx)
+        user_indices = np.full(len(content_indices), user_idx)
 
-        predicted_ratings = self.deep_model.predict([user_indices, content_indices]).flatten()
+        predicted_ratings = self.scorer.predict(user_indices, content_indices)
 
-        recommended_indices = np.argsort(predicted_ratings)[::-1][:top_n]
-        recommended_content_ids = [all_content_ids[i] for i in recommended_indices]
+        best = np.argsort(predicted_ratings)[::-1][:top_n]
+        recommended_content_ids = [all_content_ids[i] for i in content_indices[best]]
 
-        recommended_content = ContentsService.rec_content(recommended_content_ids)
+        return recommended_content_ids, predicted_ratings[best].tolist()
 
-        return recommended_content
+    def similar(self, content_id, top_n=10):
+        if self.similarity_index is None or self.similarity_index.size == 0:
+            raise ValueError("НЕТУ ДАННЫХ")
 
+        similar_content_ids, scores = self.similarity_index.similar(content_id, top_n)
 
-    def get_population_content(self, top_n=10):
-        population_content = ContentsService.popular_content(top_n)
+        return similar_content_ids.tolist(), scores.tolist()
 
-        return population_content
 
+    def is_trained(self):
+        return self.scorer is not None and self.similarity_index is not None
 
-    def get_simular_content(self, content_id, top_n=10):
-        if self.content_similarity_matrix is None or self.content_similarity_matrix.size == 0:
-            raise ValueError("НЕТУ ДАННЫХ")
+    def save(self, path):
+        """Сохраняет обученную модель и все данные для выдачи рекомендаций в каталог path"""
+        if not self.is_trained():
+            raise ValueError("Модель не тренировалась или нету данных")
 
-        content_ids = list(self.content_features.keys())
-        try:
-            content_idx = content_ids.index(content_id)
-        except ValueError:
-            return []
+        import joblib
+        from scipy.sparse import save_npz
 
-        sim_scores = list(enumerate(self.content_similarity_matrix[content_idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
 
-        sim_scores = sim_scores[1:top_n + 1]
-        similar_content_ids = [content_ids[i[0]] for i in sim_scores]
-        similar_content = ContentsService.rec_content(similar_content_ids)
+        self.save_model(path)
+        joblib.dump(self.tfidf_vectorizer, path / 'tfidf.joblib')
+        self.similarity_index.save(path)
 
-        return similar_content
+        content_ids = list(self.content_features.keys())
+        ratings = [np.nan if r is None else r for r in self.content_features.values()]
+        np.save(path / 'content_ids.npy', np.array(content_ids, dtype=np.int64))
+        np.save(path / 'content_ratings.npy', np.array(ratings, dtype=np.float64))
+        np.save(path / 'user_ids.npy', np.array(self.user_ids, dtype=np.int64))
+        np.save(path / 'item_ids.npy', np.array(self.item_ids, dtype=np.int64))
+        save_npz(path / 'interactions.npz', self.user_item_matrix)
+
+    def save_model(self, path):
+        """Файлы, специфичные для модели персональных рекомендаций"""
+        if self.deep_model is not None:
+            # Полная модель нужна только для дообучения, выдача читает массивы NumpyScorer
+            self.deep_model.save(path / 'model.keras')
+        self.scorer.save(path)
+        if self.embedding_index is not None:
+            self.embedding_index.save(path)
+
+
+    @classmethod
+    def load(cls, path):
+        """Загружает движок, сохраненный методом save, без повторного обучения"""
+        import joblib
+        from scipy.sparse import load_npz
+
+        path = Path(path)
+        engine = cls()
+
+        engine.load_model(path)
+        engine.tfidf_vectorizer = joblib.load(path / 'tfidf.joblib')
+        engine.similarity_index = SimilarityIndex.load(path)
+
+        content_ids = np.load(path / 'content_ids.npy').tolist()
+        ratings = np.load(path / 'content_ratings.npy').tolist()
+        engine.content_features = {
+            cid: None if np.isnan(rating) else rating
+            for cid, rating in zip(content_ids, ratings)
+        }
+        engine.user_ids = np.load(path / 'user_ids.npy').tolist()
+        engine.item_ids = np.load(path / 'item_ids.npy').tolist()
+        engine.user_item_matrix = load_npz(path / 'interactions.npz').tocsr()
+
+        return engine
+
+    def load_model(self, path):
+        self.scorer = NumpyScorer.load(path)
+        self.embedding_index = EmbeddingIndex.load(path)
 
 
 if __name__ == "__main__":
@@ -207,7 +280,7 @@ if __name__ == "__main__":
         print("\n1. Подготовка контентных фич...")
         engine.get_default_recommendations()
         print("✅ Контентные фичи подготовлены успешно")
-        print(f"   Размер матрицы схожести: {engine.content_similarity_matrix.shape}")
+        print(f"   Размер индекса схожести: {engine.similarity_index.neighbors.shape}")
         print(f"   Количество контентов: {len(engine.content_features)}")
 
         # Тест 2: Подготовка user-item матрицы
@@ -215,9 +288,10 @@ if __name__ == "__main__":
         engine.prepare_user_item_matrix()
         print("✅ User-item матрица подготовлена успешно")
         if engine.user_item_matrix is not None:
-            print(f"   Пользователей: {len(engine.user_item_matrix.index)}")
-            print(f"   Контентов: {len(engine.user_item_matrix.columns)}")
+            print(f"   Пользователей: {len(engine.user_ids)}")
+            print(f"   Контентов: {len(engine.item_ids)}")
             print(f"   Размер матрицы: {engine.user_item_matrix.shape}")
+            print(f"   Взаимодействий: {engine.user_item_matrix.nnz}")
         else:
             print("   ⚠️ User-item матрица пустая")
 
@@ -239,8 +313,7 @@ if __name__ == "__main__":
 
         # Тест 5: Обучение модели (если есть данные)
         if (engine.user_item_matrix is not None and
-                len(engine.user_item_matrix.index) > 0 and
-                len(engine.user_item_matrix.columns) > 0):
+                engine.user_item_matrix.nnz > 0):
 
             print("\n5. Обучение нейросети...")
             try:
@@ -250,7 +323,7 @@ if __name__ == "__main__":
 
                 # Тест 6: Рекомендации для пользователя
                 print("\n6. Тест рекомендаций...")
-                first_user_id = engine.user_item_matrix.index[0]
+                first_user_id = engine.user_ids[0]
                 recommendations = engine.recommend_for_user(first_user_id, 5)
                 print(f"✅ Рекомендации для пользователя {first_user_id}: {len(recommendations)} элементов")
                 for i, content in enumerate(recommendations, 1):
@@ -287,4 +360,4 @@ if __name__ == "__main__":
 
     print(engine.deep_model, "deep_model")
     print(engine.user_item_matrix, "user_item_matryx")
-    print(engine.content_similarity_matrix, "content_similarity_matrix")
\ No newline at end of file
+    print(engine.similarity_index.neighbors, "similarity_index")
\ No newline at end of file
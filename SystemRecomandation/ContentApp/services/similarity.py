@@ -0,0 +1,214 @@
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+
+class SimilarityIndex:
+    """
+    Top-K самых похожих товаров для каждого товара по косинусной близости TF-IDF.
+    Вместо плотной матрицы N x N хранит два массива N x K (int32 и float32).
+    """
+    EMPTY = -1
+
+    def __init__(self, content_ids, neighbors, scores, vectors=None):
+        self.content_ids = np.asarray(content_ids, dtype=np.int64)
+        # neighbors - позиции соседей в content_ids, EMPTY для незаполненных ячеек (их score = -inf)
+        self.neighbors = neighbors
+        self.scores = scores
+        # Нормированные TF-IDF векторы товаров, нужны для инкрементальных обновлений
+        self.vectors = vectors
+        self._reindex()
+
+    def _reindex(self):
+        self._positions = {content_id: i for i, content_id in enumerate(self.content_ids.tolist())}
+
+    @property
+    def size(self):
+        return len(self.content_ids)
+
+    @classmethod
+    def build(cls, content_ids, tfidf_matrix, top_k=None, block_size=None):
+        """
+        Строит индекс блоками по block_size строк: в памяти одновременно находится
+        не больше block_size x N оценок близости.
+        """
+        from sklearn.preprocessing import normalize
+
+        top_k = top_k or settings.RECOMMENDATION_SIMILARITY_TOP_K
+        block_size = block_size or settings.RECOMMENDATION_SIMILARITY_BLOCK_SIZE
+
+        vectors = normalize(tfidf_matrix.astype(np.float32), norm='l2', copy=False).tocsr()
+        vectors_t = vectors.T.tocsr()
+        n = vectors.shape[0]
+        k = max(min(top_k, n - 1), 0)
+
+        neighbors = np.full((n, k), cls.EMPTY, dtype=np.int32)
+        scores = np.full((n, k), -np.inf, dtype=np.float32)
+
+        for start in range(0, n if k else 0, block_size):
+            stop = min(start + block_size, n)
+            block = (vectors[start:stop] @ vectors_t).toarray()
+
+            # Товар не должен быть похож сам на себя
+            rows = np.arange(stop - start)
+            block[rows, start + rows] = -np.inf
+
+            block_neighbors, block_scores = cls._top_k(block, k)
+            neighbors[start:stop] = block_neighbors
+            scores[start:stop] = block_scores
+
+        return cls(content_ids, neighbors, scores, vectors)
+
+    @classmethod
+    def _top_k(cls, block, k):
+        """
+        Отсортированные по убыванию k лучших столбцов в каждой строке block.
+        Столбцы с нулевой близостью соседями не считаются: ячейки остаются EMPTY.
+        """
+        width = min(k, block.shape[1])
+        if width < block.shape[1]:
+            candidates = np.argpartition(-block, width - 1, axis=1)[:, :width]
+        else:
+            candidates = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+
+        neighbors = np.full((block.shape[0], k), cls.EMPTY, dtype=np.int32)
+        scores = np.full((block.shape[0], k), -np.inf, dtype=np.float32)
+        neighbors[:, :width] = np.take_along_axis(candidates, order, axis=1)
+        scores[:, :width] = np.take_along_axis(candidate_scores, order, axis=1)
+
+        empty = ~(scores > 0)
+        neighbors[empty] = cls.EMPTY
+        scores[empty] = -np.inf
+
+        return neighbors, scores
+
+
+    def similar(self, content_id, top_n=10):
+        """Возвращает (content_ids, scores) похожих товаров за O(K)"""
+        position = self._positions.get(content_id)
+        if position is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        neighbors = self.neighbors[position, :top_n]
+        valid = neighbors != self.EMPTY
+
+        return self.content_ids[neighbors[valid]], self.scores[position, :top_n][valid]
+
+    def upsert(self, content_id, tfidf_vector):
+        """
+        Добавляет или обновляет один товар: считает его близость ко всем товарам,
+        пересобирает его список соседей и правит списки тех, на кого он повлиял.
+        Результат совпадает с полной пересборкой build() на тех же векторах.
+        """
+        from scipy.sparse import vstack
+        from sklearn.preprocessing import normalize
+
+        vector = normalize(tfidf_vector.astype(np.float32), norm='l2').tocsr()
+        position = self._positions.get(content_id)
+
+        if position is None:
+            position = self.size
+            self.content_ids = np.append(self.content_ids, content_id)
+            self.vectors = vstack([self.vectors, vector], format='csr')
+            self.neighbors = np.vstack([
+                self.neighbors, np.full((1, self.neighbors.shape[1]), self.EMPTY, dtype=np.int32)
+            ])
+            self.scores = np.vstack([
+                self.scores, np.full((1, self.scores.shape[1]), -np.inf, dtype=np.float32)
+            ])
+            self._positions[content_id] = position
+            stale = np.empty(0, dtype=np.int64)
+        else:
+            self.vectors = vstack(
+                [self.vectors[:position], vector, self.vectors[position + 1:]], format='csr'
+            )
+            # Старая близость к этому товару больше не актуальна: такие строки
+            # пересчитываются целиком, чтобы освободившееся место занял следующий сосед
+            stale = self._rows_with_neighbor(position)
+
+        k = self.neighbors.shape[1]
+        if k == 0:
+            return
+
+        similarities = (self.vectors @ vector.T).toarray().ravel()
+        similarities[position] = -np.inf
+
+        neighbors, scores = self._top_k(similarities[np.newaxis, :], k)
+        self.neighbors[position] = neighbors[0]
+        self.scores[position] = scores[0]
+        self._refill(stale)
+
+        # Товар попадает в списки тех, у кого он лучше худшего из текущих соседей
+        candidates = (similarities > 0) & (similarities > self.scores[:, -1])
+        candidates[stale] = False
+        for row in np.nonzero(candidates)[0]:
+            self._insert_neighbor(row, position, similarities[row])
+
+    def remove(self, content_id):
+        """Удаляет товар из индекса и из списков соседей остальных товаров"""
+        position = self._positions.get(content_id)
+        if position is None:
+            return
+
+        stale = self._rows_with_neighbor(position)
+
+        keep = np.arange(self.size) != position
+        self.content_ids = self.content_ids[keep]
+        self.neighbors = self.neighbors[keep]
+        self.scores = self.scores[keep]
+        self.vectors = self.vectors[keep]
+
+        # Позиции после удаленной строки сдвигаются на одну
+        self.neighbors[self.neighbors > position] -= 1
+        stale[stale > position] -= 1
+        self._reindex()
+
+        self._refill(stale)
+
+    def _rows_with_neighbor(self, position):
+        """Строки, в списках соседей которых есть position"""
+        return np.nonzero((self.neighbors == position).any(axis=1))[0]
+
+    def _refill(self, rows):
+        """Пересчитывает списки соседей строк rows по текущим векторам, как build()"""
+        k = self.neighbors.shape[1]
+        if len(rows) == 0 or k == 0:
+            return
+
+        block = (self.vectors[rows] @ self.vectors.T).toarray()
+        block[np.arange(len(rows)), rows] = -np.inf
+
+        self.neighbors[rows], self.scores[rows] = self._top_k(block, k)
+
+    def _insert_neighbor(self, row, position, score):
+        column = np.searchsorted(-self.scores[row], -score, side='right')
+        self.neighbors[row, column + 1:] = self.neighbors[row, column:-1].copy()
+        self.scores[row, column + 1:] = self.scores[row, column:-1].copy()
+        self.neighbors[row, column] = position
+        self.scores[row, column] = score
+
+
+    def save(self, path):
+        from scipy.sparse import save_npz
+
+        path = Path(path)
+        np.save(path / 'similarity_content_ids.npy', self.content_ids)
+        np.save(path / 'similarity_neighbors.npy', self.neighbors)
+        np.save(path / 'similarity_scores.npy', self.scores)
+        save_npz(path / 'similarity_vectors.npz', self.vectors)
+
+    @classmethod
+    def load(cls, path):
+        from scipy.sparse import load_npz
+
+        path = Path(path)
+        return cls(
+            np.load(path / 'similarity_content_ids.npy'),
+            np.load(path / 'similarity_neighbors.npy'),
+            np.load(path / 'similarity_scores.npy'),
+            load_npz(path / 'similarity_vectors.npz').tocsr(),
+        )
@@ -0,0 +1,229 @@
+import time
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from ContentApp.models import Content, Category, CategoryContent, Rating, Favorite
+from ContentApp.services.data_get import ContentService
+
+
+class SyntheticDataGenerator:
+    """
+    Генератор синтетических данных большого объема для бенчмарков.
+    Пишет пачками через bulk_create (без save() и сигналов), поэтому миллион
+    взаимодействий в SQLite создается за минуты, а не за часы, как в generate_db.py.
+
+    Популярность товаров и активность пользователей распределены по степенному закону,
+    результат полностью определяется seed. Каждое взаимодействие - уникальная пара
+    (пользователь, товар): оценка, с вероятностью favorite_share - избранное,
+    с вероятностью vote_share - голос за одну из категорий товара.
+    """
+    USER_PREFIX = 'synthetic_user_'
+    SLUG_PREFIX = 'synthetic-'
+    PASSWORD = 'testpass123'
+    IMAGE = 'content_images/2024/01/01/default_product.jpg'
+
+    CATEGORY_NAMES = (
+        'Электроника', 'Книги', 'Одежда', 'Спорт', 'Дом и сад', 'Красота',
+        'Игрушки', 'Автотовары', 'Здоровье', 'Техника', 'Мебель', 'Продукты',
+    )
+    # Распределение оценок как в generate_db.py: больше хороших
+    RATING_WEIGHTS = (0.05, 0.1, 0.2, 0.3, 0.35)
+
+    def __init__(self, users=1000, contents=5000, interactions=100_000, seed=42,
+                 batch_size=5000, popularity_exponent=1.0, favorite_share=0.3,
+                 vote_share=0.2, vocabulary_size=2000, stdout=None):
+        self.users = users
+        self.contents = contents
+        self.interactions = interactions
+        self.batch_size = batch_size
+        self.popularity_exponent = popularity_exponent
+        self.favorite_share = favorite_share
+        self.vote_share = vote_share
+        self.vocabulary_size = vocabulary_size
+        self.stdout = stdout
+        self.rng = np.random.default_rng(seed)
+
+    def generate(self):
+        """Создает данные и возвращает число созданных строк по таблицам"""
+        with transaction.atomic():
+            categories = self.create_categories()
+            user_ids = self.create_users()
+            content_ids, content_categories = self.create_contents(user_ids, categories)
+            counts = self.create_interactions(user_ids, content_ids, content_categories)
+            # bulk_create не вызывает сигналы, денормализованные агрегаты пересчитываются разом
+            ContentService.reconcile_content_aggregates()
+            ContentService.reconcile_category_tallies()
+
+        counts.update({
+            'users': len(user_ids),
+            'contents': len(content_ids),
+            'categories': len(categories),
+        })
+        return counts
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def bulk_create(self, model, objects):
+        """bulk_create пачками по batch_size, objects может быть генератором"""
+        created = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+        return created
+
+    def power_law(self, size):
+        """Вероятности для size объектов со степенным убыванием, в случайном порядке id"""
+        weights = 1.0 / np.arange(1, size + 1) ** self.popularity_exponent
+        self.rng.shuffle(weights)
+        return weights / weights.sum()
+
+    def create_categories(self):
+        Category.objects.bulk_create(
+            [Category(name=name) for name in self.CATEGORY_NAMES], ignore_conflicts=True
+        )
+        return list(Category.objects.filter(name__in=self.CATEGORY_NAMES).values_list('id', flat=True))
+
+    def create_users(self):
+        start = time.perf_counter()
+        offset = User.objects.filter(username__startswith=self.USER_PREFIX).count()
+        # Хеш пароля считается один раз: make_password на каждого пользователя занимает ~0.5 с
+        password = make_password(self.PASSWORD)
+
+        first_id = User.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.bulk_create(User, (
+            User(
+                username=f'{self.USER_PREFIX}{offset + i}',
+                email=f'synthetic{offset + i}@example.com',
+                password=password,
+            )
+            for i in range(self.users)
+        ))
+
+        user_ids = np.array(User.objects.filter(
+            id__gt=first_id, username__startswith=self.USER_PREFIX
+        ).order_by('id').values_list('id', flat=True), dtype=np.int64)
+
+        self.log(f"Пользователей: {len(user_ids)} за {time.perf_counter() - start:.1f} с")
+        return user_ids
+
+    def create_contents(self, user_ids, categories):
+        """
+        Товары со словами из словаря своей основной категории: у товаров одной
+        категории пересекаются тексты, поэтому индекс похожих товаров осмыслен.
+        """
+        start = time.perf_counter()
+        offset = Content.objects.filter(slug__startswith=self.SLUG_PREFIX).count()
+        first_id = Content.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        vocabulary = np.array([f'term{i}' for i in range(self.vocabulary_size)])
+        pools = np.array_split(self.rng.permutation(self.vocabulary_size), len(categories))
+
+        primary = self.rng.integers(0, len(categories), size=self.contents)
+        # Примерно у трети товаров есть вторая категория
+        secondary = np.where(
+            self.rng.random(self.contents) < 0.3,
+            self.rng.integers(0, len(categories), size=self.contents),
+            primary,
+        )
+        authors = self.rng.choice(user_ids, size=self.contents)
+        prices = np.round(self.rng.lognormal(8, 1.2, size=self.contents), 2)
+        is_digital = self.rng.random(self.contents) < 0.2
+
+        def contents():
+            for i in range(self.contents):
+                words = vocabulary[self.rng.choice(pools[primary[i]], size=12)]
+                yield Content(
+                    title=f"{' '.join(words[:3])} {offset + i}",
+                    summary=' '.join(words[3:]),
+                    price=float(prices[i]),
+                    author_id=int(authors[i]),
+                    is_published=True,
+                    is_digital=bool(is_digital[i]),
+                    # slug задается явно: Content.save() с проверкой уникальности не вызывается
+                    slug=f'{self.SLUG_PREFIX}{offset + i}',
+                    image=self.IMAGE,
+                )
+
+        self.bulk_create(Content, contents())
+        content_ids = np.array(Content.objects.filter(
+            id__gt=first_id, slug__startswith=self.SLUG_PREFIX
+        ).order_by('id').values_list('id', flat=True), dtype=np.int64)
+
+        category_ids = np.array(categories, dtype=np.int64)
+        content_categories = np.stack([category_ids[primary], category_ids[secondary]], axis=1)
+
+        Through = Content.category.through
+        links = self.bulk_create(Through, (
+            Through(content_id=int(content_id), category_id=int(category_id))
+            for content_id, pair in zip(content_ids, content_categories)
+            for category_id in set(pair.tolist())
+        ))
+
+        self.log(f"Товаров: {len(content_ids)}, связей с категориями: {links} "
+                 f"за {time.perf_counter() - start:.1f} с")
+        return content_ids, content_categories
+
+    def sample_pairs(self, user_ids, content_ids):
+        """Уникальные пары (позиция пользователя, позиция товара) по степенным законам"""
+        total = min(self.interactions, len(user_ids) * len(content_ids))
+        user_p = self.power_law(len(user_ids))
+        content_p = self.power_law(len(content_ids))
+
+        keys = np.empty(0, dtype=np.int64)
+        while len(keys) < total:
+            missing = total - len(keys)
+            users = self.rng.choice(len(user_ids), size=int(missing * 1.3) + 16, p=user_p)
+            contents = self.rng.choice(len(content_ids), size=len(users), p=content_p)
+            keys = np.unique(np.concatenate([keys, users * len(content_ids) + contents]))
+
+        keys = self.rng.permutation(keys)[:total]
+        return keys // len(content_ids), keys % len(content_ids)
+
+    def create_interactions(self, user_ids, content_ids, content_categories):
+        start = time.perf_counter()
+        users, contents = self.sample_pairs(user_ids, content_ids)
+        total = len(users)
+
+        ratings = self.rng.choice(np.arange(1, 6), size=total, p=self.RATING_WEIGHTS)
+        is_favorite = self.rng.random(total) < self.favorite_share
+        is_vote = self.rng.random(total) < self.vote_share
+        vote_category = content_categories[contents, self.rng.integers(0, 2, size=total)]
+        votes = self.rng.choice([0, 1], size=total, p=[0.3, 0.7])
+
+        pair_user_ids = user_ids[users]
+        pair_content_ids = content_ids[contents]
+
+        counts = {}
+        counts['ratings'] = self.bulk_create(Rating, (
+            Rating(author_id=int(u), content_id=int(c), rating=int(r))
+            for u, c, r in zip(pair_user_ids, pair_content_ids, ratings)
+        ))
+        self.log(f"Оценок: {counts['ratings']} за {time.perf_counter() - start:.1f} с")
+
+        counts['favorites'] = self.bulk_create(Favorite, (
+            Favorite(user_id=int(u), content_id=int(c))
+            for u, c in zip(pair_user_ids[is_favorite], pair_content_ids[is_favorite])
+        ))
+        self.log(f"Избранного: {counts['favorites']} за {time.perf_counter() - start:.1f} с")
+
+        counts['category_votes'] = self.bulk_create(CategoryContent, (
+            CategoryContent(user_id=int(u), content_id=int(c), category_id=int(category), vote=int(vote))
+            for u, c, category, vote in zip(
+                pair_user_ids[is_vote], pair_content_ids[is_vote], vote_category[is_vote], votes[is_vote]
+            )
+        ))
+        self.log(f"Голосов за категории: {counts['category_votes']} за {time.perf_counter() - start:.1f} с")
+
+        return counts
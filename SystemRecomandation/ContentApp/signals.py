@@ -1,61 +1,105 @@
 # ContentApp/signals.py
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
 from django.contrib.auth.models import User
 from ContentApp.models import Favorite, Rating, CategoryContent
+from ContentApp.services.data_get import ContentService
+from ContentApp.utils.recommendation_cache import RecommendationCache
 
 
 @receiver([post_save, post_delete], sender=Favorite)
 def clear_recommendation_cache_on_favorite_change(sender, instance, **kwargs):
     """Очищает кэш рекомендаций при изменении избранного"""
-    if hasattr(instance, 'user'):
-        # Очищаем кэш рекомендаций для конкретного пользователя
-        user_id = instance.user.id
+    RecommendationCache.invalidate_user(instance.user_id)
 
-        # Ищем все ключи кэша для этого пользователя
-        cache_keys_to_delete = []
-        for key in cache._cache.keys():  # Адаптируй под твой бэкенд кэша
-            if isinstance(key, str) and f"user_recommendations_{user_id}_" in key:
-                cache_keys_to_delete.append(key)
 
-        # Удаляем найденные ключи
-        for key in cache_keys_to_delete:
-            cache.delete(key)
+@receiver(post_save, sender=Favorite)
+def update_favorite_count_on_save(sender, instance, created, raw=False, **kwargs):
+    """Поддерживает Content.favorite_count и popularity_score"""
+    if created and not raw:
+        ContentService.apply_favorite_change(instance.content_id, 1)
 
-        print(f"🧹 Очищен кэш рекомендаций для пользователя {user_id}")
+
+@receiver(post_delete, sender=Favorite)
+def update_favorite_count_on_delete(sender, instance, **kwargs):
+    ContentService.apply_favorite_change(instance.content_id, -1)
 
 
 @receiver([post_save, post_delete], sender=Rating)
 def clear_recommendation_cache_on_rating_change(sender, instance, **kwargs):
     """Очищает кэш рекомендаций при изменении рейтингов"""
-    if hasattr(instance, 'author'):
-        user_id = instance.author.id
-        cache.delete_pattern(f"user_recommendations_{user_id}_*")
+    RecommendationCache.invalidate_user(instance.author_id)
+
+
+@receiver(pre_save, sender=Rating)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Запоминает оценку до изменения, чтобы применить к товару только разницу"""
+    instance._previous_rating = None
+    if not raw and not instance._state.adding and instance.pk:
+        instance._previous_rating = Rating.objects.filter(
+            pk=instance.pk
+        ).values_list('content_id', 'rating').first()
+
+
+@receiver(post_save, sender=Rating)
+def update_rating_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    """Поддерживает Content.rating_count/rating_sum при создании и изменении оценки"""
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_rating', None)
+    rating = int(instance.rating)
+
+    if previous is None:
+        ContentService.apply_rating_change(instance.content_id, 1, rating)
+    elif previous[0] == instance.content_id:
+        if rating != previous[1]:
+            ContentService.apply_rating_change(instance.content_id, 0, rating - previous[1])
+    else:
+        ContentService.apply_rating_change(previous[0], -1, -previous[1])
+        ContentService.apply_rating_change(instance.content_id, 1, rating)
+
+
+@receiver(post_delete, sender=Rating)
+def update_rating_aggregates_on_delete(sender, instance, **kwargs):
+    ContentService.apply_rating_change(instance.content_id, -1, -int(instance.rating))
 
 
 @receiver([post_save, post_delete], sender=CategoryContent)
 def clear_recommendation_cache_on_vote_change(sender, instance, **kwargs):
     """Очищает кэш рекомендаций при изменении голосов"""
-    if hasattr(instance, 'user'):
-        user_id = instance.user.id
-        cache.delete_pattern(f"user_recommendations_{user_id}_*")
-
-
-# Для Redis или других бэкендов с поддержкой delete_pattern
-def clear_all_user_recommendations(user_id):
-    """Утилита для полной очистки кэша рекомендаций пользователя"""
-    # Если используешь Redis
-    try:
-        from django_redis import get_redis_connection
-        redis = get_redis_connection("default")
-        pattern = f"*user_recommendations_{user_id}_*"
-        keys = redis.keys(pattern)
-        if keys:
-            redis.delete(*keys)
-            print(f"🧹 Очищено {len(keys)} ключей рекомендаций для пользователя {user_id}")
-    except:
-        # Fallback для локального кэша
-        for key in list(cache._cache.keys()):
-            if isinstance(key, str) and f"user_recommendations_{user_id}_" in key:
-                cache.delete(key)
\ No newline at end of file
+    RecommendationCache.invalidate_user(instance.user_id)
+
+
+@receiver(pre_save, sender=CategoryContent)
+def remember_previous_vote(sender, instance, raw=False, **kwargs):
+    """Запоминает голос до изменения, чтобы применить к итогам только разницу"""
+    instance._previous_vote = None
+    if not raw and not instance._state.adding and instance.pk:
+        instance._previous_vote = CategoryContent.objects.filter(
+            pk=instance.pk
+        ).values_list('content_id', 'category_id', 'vote').first()
+
+
+@receiver(post_save, sender=CategoryContent)
+def update_category_tally_on_save(sender, instance, created, raw=False, **kwargs):
+    """Поддерживает CategoryVoteTally при создании и изменении голоса"""
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_vote', None)
+    vote = int(instance.vote)
+
+    if previous is None:
+        ContentService.apply_category_vote_change(instance.content_id, instance.category_id, 1, vote)
+    elif previous[:2] == (instance.content_id, instance.category_id):
+        if vote != previous[2]:
+            ContentService.apply_category_vote_change(instance.content_id, instance.category_id, 0, vote - previous[2])
+    else:
+        ContentService.apply_category_vote_change(previous[0], previous[1], -1, -previous[2])
+        ContentService.apply_category_vote_change(instance.content_id, instance.category_id, 1, vote)
+
+
+@receiver(post_delete, sender=CategoryContent)
+def update_category_tally_on_delete(sender, instance, **kwargs):
+    ContentService.apply_category_vote_change(instance.content_id, instance.category_id, -1, -int(instance.vote))
@@ -8,7 +8,10 @@ urlpatterns = [
     path('api/favorites/', views.FavoriteContentView.as_view(), name='api_favorites'),
     path('api/rate/', views.RatingView.as_view(), name='api_rate'),
     path('api/popular/', views.PopularContentView.as_view(), name='api_popular'),
+    path('api/contents/<int:content_id>/similar/', views.SimilarContentView.as_view(), name='api_similar_content'),
     path('api/recommendations/', views.RecommendationsView.as_view(), name='api_recommendations'),
+    path('api/async/recommendations/', views.recommendations_async_view, name='api_recommendations_async'),
+    path('api/async/home/', views.home_feed_async_view, name='api_home_async'),
     path('api/category-vote/', views.CategoryVoteView.as_view(), name='api_category_vote'),
 
     # Auth API
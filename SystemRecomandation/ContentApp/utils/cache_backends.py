@@ -0,0 +1,285 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# Счетчики TieredCache по LOCATION: экземпляры бэкенда создаются на каждый поток,
+# а статистика нужна на процесс
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кэш в SQLite-файле на локальном диске: общий для всех процессов-воркеров
+    и переживает перезапуск, внешних сервисов не требует.
+
+    LOCATION - путь к файлу. Записи с истекшим TTL не читаются и удаляются при
+    вытеснении; когда записей больше MAX_ENTRIES, удаляется 1/CULL_FREQUENCY
+    самых старых по времени записи. incr атомарен между процессами.
+    """
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cache ('
+        'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, stored REAL NOT NULL)'
+    )
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # sqlite3-соединение нельзя делить между потоками и между процессами после fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(self.SCHEMA)
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_stored_idx ON cache (stored)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _live(self, key, now):
+        row = self.connection.execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, now)
+        ).fetchone()
+        return row
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._live(key, time.time())
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+
+        placeholders = ', '.join('?' * len(key_map))
+        rows = self.connection.execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) AND (expires IS NULL OR expires > ?)',
+            (*key_map, time.time()),
+        )
+        return {key_map[key]: pickle.loads(value) for key, value in rows}
+
+    def _write(self, key, value, timeout, only_if_missing=False):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        if expires is not None and expires <= now:
+            # Нулевой или отрицательный TTL - значение сразу устарело
+            self.connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+            return False
+
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        update = 'UPDATE SET value = excluded.value, expires = excluded.expires, stored = excluded.stored'
+        if only_if_missing:
+            update += ' WHERE cache.expires IS NOT NULL AND cache.expires <= excluded.stored'
+
+        cursor = self.connection.execute(
+            f'INSERT INTO cache (key, value, expires, stored) VALUES (?, ?, ?, ?) ON CONFLICT (key) DO {update}',
+            (key, value, expires, now),
+        )
+        written = cursor.rowcount > 0
+        if written:
+            self._cull(now)
+        return written
+
+    def _cull(self, now):
+        connection = self.connection
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count <= self._max_entries:
+            return
+
+        connection.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored LIMIT ?)',
+                (max(count // self._cull_frequency, count - self._max_entries),),
+            )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write(key, value, timeout, only_if_missing=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self.connection
+        # BEGIN IMMEDIATE блокирует запись другим процессам между чтением и записью
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._live(key, time.time())
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?', (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._live(key, time.time()) is not None
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кэш: ограниченный LRU в памяти процесса перед общим кэшем
+    (алиас из CACHES, например SQLiteCache или RedisCache).
+
+    Чтение идет сначала в память, промах - в общий уровень с копированием
+    значения в память. Запись, удаление и incr идут в оба уровня. Записи в
+    памяти живут не дольше LOCAL_TIMEOUT, поэтому изменения из других процессов
+    становятся видны с такой задержкой. Изменяемые ключи (например, счетчики
+    поколений) перечисляются в SHARED_ONLY_PREFIXES и в память не попадают.
+
+    OPTIONS:
+        SHARED - алиас общего кэша в CACHES
+        LOCAL_MAX_ENTRIES - размер LRU в памяти (по умолчанию 1000)
+        LOCAL_TIMEOUT - максимальный TTL записи в памяти, с (по умолчанию 30)
+        SHARED_ONLY_PREFIXES - префиксы ключей, которые читаются только из общего кэша
+    """
+
+    def __init__(self, name, params):
+        # Параметры уровней не относятся к BaseCache; OPTIONS копируется,
+        # потому что это словарь из settings.CACHES
+        options = dict(params.get('OPTIONS', {}))
+        self.shared_alias = options.pop('SHARED')
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 30)
+        self.shared_only_prefixes = tuple(options.pop('SHARED_ONLY_PREFIXES', ()))
+        local_max_entries = options.pop('LOCAL_MAX_ENTRIES', 1000)
+        super().__init__({**params, 'OPTIONS': options})
+
+        # LocMemCache с одним именем делит хранилище между потоками процесса
+        self.local = LocMemCache(f'tiered-{name}', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': local_max_entries},
+        })
+        with _stats_lock:
+            self._stats = _stats.setdefault(name, Counter())
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def count(self, **deltas):
+        with _stats_lock:
+            self._stats.update(deltas)
+
+    def get_stats(self):
+        """Счетчики попаданий этого процесса: local_hits, shared_hits, misses, sets"""
+        with _stats_lock:
+            stats = dict(self._stats)
+        for name in ('local_hits', 'shared_hits', 'misses', 'sets'):
+            stats.setdefault(name, 0)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['local_hits'] + stats['shared_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def is_local(self, key):
+        return not (self.shared_only_prefixes and str(key).startswith(self.shared_only_prefixes))
+
+    def local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        if self.is_local(key):
+            value = self.local.get(key, missing, version=version)
+            if value is not missing:
+                self.count(local_hits=1)
+                return value
+
+        value = self.shared.get(key, missing, version=version)
+        if value is missing:
+            self.count(misses=1)
+            return default
+
+        self.count(shared_hits=1)
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.local.get_many([key for key in keys if self.is_local(key)], version=version)
+        rest = [key for key in keys if key not in found]
+        shared = self.shared.get_many(rest, version=version) if rest else {}
+
+        for key, value in shared.items():
+            if self.is_local(key):
+                self.local.set(key, value, self.local_timeout, version=version)
+        self.count(local_hits=len(found), shared_hits=len(shared), misses=len(rest) - len(shared))
+
+        found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self.is_local(key):
+            self.local.set(key, value, self.local_ttl(timeout), version=version)
+        self.count(sets=1)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self.is_local(key):
+            self.local.set(key, value, self.local_ttl(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return (self.is_local(key) and self.local.has_key(key, version=version)) or \
+            self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
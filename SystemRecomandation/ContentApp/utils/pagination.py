@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class KeysetPaginator:
+    """
+    Keyset-пагинация товаров по (-created_at, -id). Следующая страница выбирается
+    условием "строго после последнего товара" по индексу, без OFFSET, поэтому глубокие
+    страницы стоят столько же, сколько первая. Курсор - непрозрачная base64-строка.
+    """
+    ORDERING = ('-created_at', '-id')
+
+    def __init__(self, page_size=None, max_page_size=None):
+        self.max_page_size = max_page_size or settings.CONTENT_MAX_PAGE_SIZE
+        self.page_size = min(page_size or settings.CONTENT_PAGE_SIZE, self.max_page_size)
+
+    @staticmethod
+    def encode_cursor(content):
+        position = json.dumps([content.created_at.isoformat(), content.id])
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Возвращает (created_at, id) или ValueError для поврежденного курсора"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, content_id = json.loads(base64.urlsafe_b64decode(padded))
+            return datetime.fromisoformat(created_at), int(content_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError("Некорректный курсор") from None
+
+    def get_page_size(self, value):
+        """Размер страницы из параметра запроса, не больше max_page_size"""
+        try:
+            page_size = int(value)
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate(self, queryset, cursor=None, page_size=None):
+        """Возвращает (товары страницы, курсор следующей страницы или None)"""
+        page_size = page_size or self.page_size
+        queryset = queryset.order_by(*self.ORDERING)
+
+        if cursor:
+            created_at, content_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=content_id)
+            )
+
+        # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+        items = list(queryset[:page_size + 1])
+        if len(items) <= page_size:
+            return items, None
+
+        items = items[:page_size]
+        return items, self.encode_cursor(items[-1])
+
+    def paginate_request(self, queryset, request):
+        """paginate с параметрами cursor и page_size из GET-запроса"""
+        return self.paginate(
+            queryset,
+            cursor=request.GET.get('cursor'),
+            page_size=self.get_page_size(request.GET.get('page_size')),
+        )
@@ -0,0 +1,81 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class RecommendationCache:
+    """
+    Кэш рекомендаций с инвалидацией через счетчики поколений.
+
+    В ключ каждой записи входят поколение пользователя и глобальное поколение
+    (новая модель или пересчет UserRecommendation). Сброс - один cache.incr
+    счетчика вместо перебора ключей: старые записи перестают читаться и уходят
+    по TTL. Используются только get_many/set/add/incr, поэтому подходит любой
+    бэкенд Django cache.
+    """
+    PREFIX = 'user_recommendations'
+    GLOBAL_GENERATION_KEY = 'user_recommendations_generation'
+
+    @staticmethod
+    def user_generation_key(user_id):
+        return f'{RecommendationCache.PREFIX}_generation_{user_id}'
+
+    @staticmethod
+    def new_generation():
+        # Счетчик, вытесненный из кэша, начинается заново с текущего времени
+        # и не повторяет поколение, под которым могли остаться старые записи
+        return time.time_ns()
+
+    @staticmethod
+    def get_generations(user_id):
+        """(поколение пользователя, глобальное поколение) за одно обращение к кэшу"""
+        keys = (RecommendationCache.user_generation_key(user_id), RecommendationCache.GLOBAL_GENERATION_KEY)
+        generations = cache.get_many(keys)
+
+        for key in keys:
+            if key not in generations:
+                cache.add(key, RecommendationCache.new_generation(), timeout=None)
+                generations[key] = cache.get(key)
+
+        return tuple(generations[key] for key in keys)
+
+    @staticmethod
+    def make_key(user_id, name):
+        user_generation, global_generation = RecommendationCache.get_generations(user_id)
+        return f'{RecommendationCache.PREFIX}_{user_id}_{name}_{user_generation}_{global_generation}'
+
+    @staticmethod
+    def get_or_set(user_id, name, compute, timeout=None):
+        """Значение name для пользователя из кэша, иначе compute() с сохранением в кэш"""
+        key = RecommendationCache.make_key(user_id, name)
+
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, timeout or settings.RECOMMENDATION_CACHE_TIMEOUT)
+
+        return value
+
+    @staticmethod
+    def bump(key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Счетчика еще нет (или он вытеснен) - старых записей под новым поколением нет
+            cache.add(key, RecommendationCache.new_generation(), timeout=None)
+
+    @staticmethod
+    def invalidate_user(user_id):
+        """
+        Сбрасывает кэш рекомендаций пользователя после коммита транзакции: иначе
+        параллельный запрос успел бы закэшировать старые данные под новым поколением
+        """
+        key = RecommendationCache.user_generation_key(user_id)
+        transaction.on_commit(lambda: RecommendationCache.bump(key))
+
+    @staticmethod
+    def invalidate_all():
+        """Сбрасывает кэш рекомендаций всех пользователей"""
+        transaction.on_commit(lambda: RecommendationCache.bump(RecommendationCache.GLOBAL_GENERATION_KEY))
@@ -1,36 +1,150 @@
-from ContentApp.services.recomendation import RecommendationEngine
+from ContentApp.services.backends import get_backend
+from ContentApp.services.model_store import ModelStore
 from ContentApp.services.data_get import ContentsService
-from django.core.cache import cache
-import time
+from ContentApp.utils.recommendation_cache import RecommendationCache
+from ContentApp.utils.similarity_updater import SimilarityUpdater
+from ContentApp.models import Favorite, Rating, CategoryContent, UserRecommendation
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 class RecommendationUpdater:
     """Утилита для обновления рекомендаций"""
 
+    # Таблицы взаимодействий, изменения в которых влияют на модель
+    TRACKED_MODELS = {
+        'favorites': Favorite,
+        'ratings': Rating,
+        'category_votes': CategoryContent,
+    }
+
     @staticmethod
-    def update_recommendations_for_user(user):
-        """Принудительно обновляет рекомендации для пользователя"""
-        cache_key = f"user_recommendations_{user.id}_{int(time.time())}"
+    def get_interaction_counts():
+        return {name: model.objects.count() for name, model in RecommendationUpdater.TRACKED_MODELS.items()}
 
-        engine = RecommendationEngine()
+    @staticmethod
+    def count_changes_since(meta):
+        """Считает строки Favorite/Rating/CategoryContent, измененные после сборки модели"""
+        built_at = parse_datetime(meta['built_at'])
+        built_counts = meta.get('counts', {})
+        current_counts = RecommendationUpdater.get_interaction_counts()
 
-        try:
-            # Полная пересборка с нуля
-            engine.get_default_recommendations()
-            engine.prepare_user_item_matrix()
+        changes = 0
+        for name, model in RecommendationUpdater.TRACKED_MODELS.items():
+            created = model.objects.filter(created_at__gt=built_at).count()
+            changes += created
+
+            if hasattr(model, 'updated_at'):
+                changes += model.objects.filter(created_at__lte=built_at, updated_at__gt=built_at).count()
+
+            # Удаления не оставляют следов по времени - восстанавливаем их по числу строк
+            changes += max(built_counts.get(name, 0) + created - current_counts[name], 0)
+
+        return changes
+
+    @staticmethod
+    def needs_rebuild(threshold, max_age):
+        """Возвращает (нужно ли переобучать модель, причина)"""
+        meta = ModelStore().get_meta()
+        if meta is None or 'built_at' not in meta:
+            return True, 'нет опубликованной модели'
+
+        age = (timezone.now() - parse_datetime(meta['built_at'])).total_seconds()
+        if age >= max_age:
+            return True, f'модели {int(age)} с'
+
+        changes = RecommendationUpdater.count_changes_since(meta)
+        if changes >= threshold:
+            return True, f'изменений с последней сборки: {changes}'
+
+        return False, f'изменений с последней сборки: {changes}'
 
-            if (engine.user_item_matrix is not None and
-                    len(engine.user_item_matrix.index) > 0):
-                # Обучаем с нуля
-                engine.train_deep_model(epochs=5, batch_size=32)
+    @staticmethod
+    def rebuild_model(epochs=5, batch_size=32, backend=None):
+        """
+        Обучает движок с нуля и публикует его как новую версию в ModelStore.
+        backend - имя движка, по умолчанию settings.RECOMMENDATION_BACKEND
+        """
+        # Фиксируем момент и объем данных до чтения, чтобы изменения во время обучения
+        # попали в следующую сборку
+        built_at = timezone.now()
+        counts = RecommendationUpdater.get_interaction_counts()
+
+        engine = get_backend(backend)()
+        engine.fit(epochs=epochs, batch_size=batch_size)
 
-                # Получаем рекомендации
-                recommendations = engine.recommend_for_user(user.id, top_n=15)
+        return ModelStore().publish(
+            engine,
+            users=len(engine.user_ids),
+            contents=len(engine.content_features),
+            built_at=built_at.isoformat(),
+            counts=counts,
+        )
+
+    @staticmethod
+    def store_recommendations(engine, version, user_ids, top_n=None):
+        """Пересчитывает строки UserRecommendation для пачки пользователей одной транзакцией"""
+        top_n = top_n or settings.RECOMMENDATION_TOP_N
 
-                # Сохраняем в кэш
-                cache.set(cache_key, recommendations, timeout=7200)  # 2 часа
+        rows = []
+        for user_id in user_ids:
+            recommended = engine.recommend(user_id, top_n)
+            if recommended is None:
+                continue
 
-                return recommendations
+            for rank, (content_id, score) in enumerate(zip(*recommended), start=1):
+                rows.append(UserRecommendation(
+                    user_id=user_id,
+                    rank=rank,
+                    content_id=content_id,
+                    score=score,
+                    model_version=version,
+                ))
+
+        with transaction.atomic():
+            UserRecommendation.objects.filter(user_id__in=user_ids).delete()
+            UserRecommendation.objects.bulk_create(rows)
+
+        return len(rows)
+
+    @staticmethod
+    def materialize_recommendations(top_n=None, batch_size=500):
+        """Заполняет таблицу UserRecommendation для всех пользователей из последней версии модели"""
+        store = ModelStore()
+        version = store.latest_version()
+        if version is None:
+            return 0
+
+        engine = store.load(version)
+
+        total = 0
+        for start in range(0, len(engine.user_ids), batch_size):
+            batch = engine.user_ids[start:start + batch_size]
+            total += RecommendationUpdater.store_recommendations(engine, version, batch, top_n)
+
+        # Пользователи, которых нет в новой модели, получают популярное через fallback
+        UserRecommendation.objects.exclude(model_version=version).delete()
+        RecommendationCache.invalidate_all()
+
+        return total
+
+    @staticmethod
+    def update_recommendations_for_user(user):
+        """Принудительно пересчитывает рекомендации пользователя по последней версии модели"""
+        try:
+            store = ModelStore()
+            version = store.latest_version()
+            engine = store.get_engine()
+
+            if engine is not None:
+                RecommendationUpdater.store_recommendations(engine, version, [user.id])
+                RecommendationCache.invalidate_user(user.id)
+
+                recommendations = ContentsService.get_user_recommendations(user, top_n=15)
+                if recommendations:
+                    return recommendations
 
         except Exception as e:
             print(f"Ошибка при обновлении рекомендаций: {e}")
@@ -39,10 +153,12 @@ class RecommendationUpdater:
 
     @staticmethod
     def update_all_users_recommendations():
-        """Обновляет рекомендации для всех пользователей (для cron задачи)"""
-        from django.contrib.auth.models import User
+        """Переобучает модель и пересчитывает рекомендации для всех пользователей (для cron задачи)"""
+        version = RecommendationUpdater.rebuild_model()
+        print(f"Опубликована модель версии {version}")
+
+        total = RecommendationUpdater.materialize_recommendations()
+        print(f"Сохранено рекомендаций: {total}")
 
-        users = User.objects.all()
-        for user in users:
-            print(f"Обновление рекомендаций для пользователя {user.id}...")
-            RecommendationUpdater.update_recommendations_for_user(user)
\ No newline at end of file
+        total = SimilarityUpdater.materialize_similar_content()
+        print(f"Сохранено похожих товаров: {total}")
@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ContentApp.models import Content, SimilarContent
+from ContentApp.services.model_store import ModelStore
+from ContentApp.services.recomendation import RecommendationEngine
+from ContentApp.services.similarity import SimilarityIndex
+
+
+class SimilarityUpdater:
+    """
+    Инкрементально обновляет индекс похожих товаров по изменениям Content:
+    векторизует только измененные товары уже обученным TF-IDF (тот же словарь и idf).
+    Изменения копятся и применяются пачкой воркером переобучения между полными
+    пересборками. Таблица SimilarContent обновляется вместе с индексом: для затронутых товаров.
+    """
+
+    @staticmethod
+    def is_enabled():
+        return settings.RECOMMENDATION_INCREMENTAL_SIMILARITY
+
+    @staticmethod
+    def apply_changes():
+        """
+        Применяет к индексу последней версии все изменения Content после прошлой
+        синхронизации одной правкой: измененные и новые товары (по updated_at) и
+        удаленные (есть в индексе, но нет в БД). Возвращает (версия или None,
+        сколько товаров обновлено, сколько удалено).
+        """
+        counts = [0, 0]
+
+        def update(engine, meta):
+            index = engine.similarity_index
+            synced_at = parse_datetime(
+                meta.get('similarity_synced_at') or meta.get('built_at') or meta['created_at']
+            )
+            # Момент фиксируется до чтения, чтобы изменения во время правки попали в следующую
+            now = timezone.now()
+
+            changed = list(Content.objects.filter(updated_at__gt=synced_at).values_list(
+                'id', 'title', 'summary', 'author__username'
+            ))
+            existing = set(Content.objects.values_list('id', flat=True))
+            deleted = [content_id for content_id in index.content_ids.tolist() if content_id not in existing]
+            if not changed and not deleted:
+                return False
+
+            # Товары, у которых измененные или удаленные были в похожих до правки
+            affected = set()
+            for content_id in [row[0] for row in changed] + deleted:
+                affected.update(SimilarityUpdater.neighbour_of(index, content_id))
+
+            engine.partial_update(
+                saved=[
+                    (content_id, RecommendationEngine.content_text(title, summary, author))
+                    for content_id, title, summary, author in changed
+                ],
+                deleted=deleted,
+            )
+
+            for content_id, *_ in changed:
+                affected.add(content_id)
+                affected.update(SimilarityUpdater.neighbour_of(index, content_id))
+            SimilarityUpdater.store_similar_content(index, affected)
+
+            meta['similarity_synced_at'] = now.isoformat()
+            counts[:] = [len(changed), len(deleted)]
+
+        return (ModelStore().update_similarity(update), *counts)
+
+    @staticmethod
+    def neighbour_of(index, content_id, top_n=None):
+        """Товары, у которых content_id входит в первые top_n похожих"""
+        top_n = top_n or settings.RECOMMENDATION_SIMILAR_TOP_N
+        position = index._positions.get(content_id)
+        if position is None:
+            return []
+
+        rows = (index.neighbors[:, :top_n] == position).any(axis=1).nonzero()[0]
+        return index.content_ids[rows].tolist()
+
+    @staticmethod
+    def store_similar_content(index, content_ids, top_n=None):
+        """Пересчитывает строки SimilarContent для товаров content_ids одной транзакцией"""
+        top_n = top_n or settings.RECOMMENDATION_SIMILAR_TOP_N
+        content_ids = list(content_ids)
+
+        similar = {content_id: index.similar(content_id, top_n) for content_id in content_ids}
+        involved = set(content_ids)
+        for neighbour_ids, _ in similar.values():
+            involved.update(neighbour_ids.tolist())
+        # Индекс может отставать от БД: строки с удаленными товарами нарушили бы внешний ключ
+        existing = set(Content.objects.filter(id__in=involved).values_list('id', flat=True))
+
+        rows = []
+        for content_id, (neighbour_ids, scores) in similar.items():
+            if content_id not in existing:
+                continue
+
+            rank = 0
+            for neighbour_id, score in zip(neighbour_ids.tolist(), scores.tolist()):
+                if neighbour_id in existing:
+                    rank += 1
+                    rows.append(SimilarContent(
+                        content_id=content_id, neighbour_id=neighbour_id, score=score, rank=rank,
+                    ))
+
+        with transaction.atomic():
+            SimilarContent.objects.filter(content_id__in=content_ids).delete()
+            SimilarContent.objects.bulk_create(rows)
+
+        return len(rows)
+
+    @staticmethod
+    def materialize_similar_content(top_n=None, batch_size=500):
+        """Заполняет таблицу SimilarContent для всех товаров из индекса последней версии модели"""
+        store = ModelStore()
+        version = store.latest_version()
+        if version is None:
+            return 0
+
+        # Нужен только индекс похожих товаров, сам движок не загружается
+        index = SimilarityIndex.load(store.root / version)
+        content_ids = index.content_ids.tolist()
+
+        total = 0
+        for start in range(0, len(content_ids), batch_size):
+            total += SimilarityUpdater.store_similar_content(
+                index, content_ids[start:start + batch_size], top_n
+            )
+
+        return total
@@ -1,6 +1,6 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.cache import cache
-import time
+from django.conf import settings
+from django.http import JsonResponse
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
@@ -13,10 +13,11 @@ from django.utils.decorators import method_decorator
 
 from .serializers import ContentSerializer, RatingSerializer, FavoriteSerializer, UserSerializer
 from .services.data_get import ContentsService, ContentService
+from .services.feed import FeedService
 from ContentApp.models import Content, Rating, Favorite, CategoryContent
-from ContentApp.services.recomendation import RecommendationEngine
 from .forms import UserRegistrationForm
 from .utils.recommendation_updater import RecommendationUpdater
+from .utils.pagination import KeysetPaginator
 
 
 class RefreshRecommendationsView(APIView):
@@ -26,17 +27,7 @@ class RefreshRecommendationsView(APIView):
         """Принудительно обновляет рекомендации для текущего пользователя"""
         user = request.user
 
-        # Очищаем весь кэш для пользователя
-        from django.core.cache import cache
-        keys_to_delete = []
-        for key in cache._cache.keys():
-            if isinstance(key, str) and f"user_recommendations_{user.id}_" in key:
-                keys_to_delete.append(key)
-
-        for key in keys_to_delete:
-            cache.delete(key)
-
-        # Генерируем новые рекомендации
+        # Генерируем новые рекомендации, кэш пользователя сбрасывается внутри
         recommendations = RecommendationUpdater.update_recommendations_for_user(user)
 
         # Сериализуем и возвращаем
@@ -51,13 +42,34 @@ class RefreshRecommendationsView(APIView):
 
 
 # API Views
+def content_identity_map(request):
+    """Словарь content_id -> Content, общий для всех источников товаров одного запроса"""
+    if not hasattr(request, '_content_identity_map'):
+        request._content_identity_map = {}
+    return request._content_identity_map
+
+
+def paginated_response(request, contents, serializer_class):
+    """Страница товаров по курсору: {'results': [...], 'next_cursor': ...}"""
+    try:
+        page, next_cursor = KeysetPaginator().paginate_request(contents, request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': serializer_class(page, many=True).data,
+        'next_cursor': next_cursor,
+    })
+
+
 class ContentView(APIView):
     serializer_class = ContentSerializer
 
     def get(self, request):
-        contents = ContentsService.get_non_favorite_content(request.user)
-        serializer = self.serializer_class(contents, many=True)
-        return Response(serializer.data)
+        contents = ContentsService.with_listing_data(
+            ContentsService.get_non_favorite_content(request.user), request.user
+        )
+        return paginated_response(request, contents, self.serializer_class)
 
 
 class FavoriteContentView(APIView):
@@ -65,9 +77,10 @@ class FavoriteContentView(APIView):
     serializer_class = ContentSerializer
 
     def get(self, request):
-        contents = ContentsService.get_favorite_content(request.user)
-        serializer = self.serializer_class(contents, many=True)
-        return Response(serializer.data)
+        contents = ContentsService.with_listing_data(
+            ContentsService.get_favorite_content(request.user), request.user
+        )
+        return paginated_response(request, contents, self.serializer_class)
 
     def post(self, request):
         content_id = request.data.get('content_id')
@@ -142,65 +155,52 @@ class PopularContentView(APIView):
     serializer_class = ContentSerializer
 
     def get(self, request):
-        top_n = int(request.GET.get('top', 10))
-        contents = ContentsService.popular_content(top_n)
+        try:
+            top_n = min(int(request.GET.get('top', 10)), settings.CONTENT_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'top must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        contents = ContentsService.popular_content(max(top_n, 1), request.user)
         serializer = self.serializer_class(contents, many=True)
         return Response(serializer.data)
 
 
-class RecommendationsView(APIView):
-    permission_classes = [IsAuthenticated]
+class SimilarContentView(APIView):
     serializer_class = ContentSerializer
 
-    def get_recommendations_with_retraining(self, user):
-        """Получает рекомендации с переобучением модели с нуля"""
-        cache_key = f"user_recommendations_{user.id}_{int(time.time() // 3600)}"  # Кэш на час
-
-        # Проверяем кэш
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        engine = RecommendationEngine()
-
+    def get(self, request, content_id):
         try:
-            # Шаг 1: Подготавливаем данные с нуля
-            print(f"🔄 Переобучение модели для пользователя {user.id}...")
-            engine.get_default_recommendations()
-            engine.prepare_user_item_matrix()
+            top_n = min(int(request.GET.get('top', 10)), settings.RECOMMENDATION_SIMILAR_TOP_N)
+        except ValueError:
+            return Response({'error': 'top must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Шаг 2: Строим и обучаем модель с нуля
-            try:
-                if (engine.user_item_matrix is not None and
-                        len(engine.user_item_matrix.index) > 0 and
-                        len(engine.user_item_matrix.columns) > 0):
+        contents = list(ContentsService.get_similar_content(content_id, max(top_n, 1), request.user))
+        # Пустой результат - проверяем, что товар вообще существует
+        if not contents:
+            get_object_or_404(Content, id=content_id, is_published=True)
 
-                    engine.train_deep_model(epochs=5, batch_size=32)
-                    print(f"✅ Модель переобучена для пользователя {user.id}")
+        serializer = self.serializer_class(contents, many=True)
+        return Response(serializer.data)
 
-                    # Шаг 3: Получаем рекомендации
-                    recommendations = engine.recommend_for_user(user.id, top_n=10)
-                else:
-                    # Если недостаточно данных
-                    recommendations = ContentsService.popular_content(10)
 
-            except Exception as train_error:
-                print(f"⚠️ Ошибка обучения: {train_error}")
-                recommendations = ContentsService.popular_content(10)
+class RecommendationsView(APIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = ContentSerializer
 
-            # Кэшируем результат
-            cache.set(cache_key, recommendations, timeout=3600)  # 1 час
+    def get_recommendations(self, request):
+        """Получает предрассчитанные рекомендации пользователя из таблицы UserRecommendation"""
+        recommendations = ContentsService.get_user_recommendations(
+            request.user, top_n=10, identity_map=content_identity_map(request)
+        )
 
-            return recommendations
+        if not recommendations:
+            # Пользователь еще не попал в пакетный расчет
+            recommendations = ContentsService.popular_content(10, request.user)
 
-        except Exception as e:
-            print(f"❌ Ошибка рекомендательной системы: {e}")
-            recommendations = ContentsService.popular_content(10)
-            cache.set(cache_key, recommendations, timeout=300)  # 5 минут при ошибке
-            return recommendations
+        return recommendations
 
     def get(self, request):
-        recommendations = self.get_recommendations_with_retraining(request.user)
+        recommendations = self.get_recommendations(request)
         serializer = self.serializer_class(recommendations, many=True)
         return Response(serializer.data)
 
@@ -391,20 +391,28 @@ def profile_view(request):
 @login_required
 def content_list_view(request):
     """Список всего контента"""
-    contents = ContentsService.get_all_content()
-    favorite_contents = ContentsService.get_favorite_content(request.user)
-    favorite_ids = [c.id for c in favorite_contents]
+    contents = ContentsService.with_listing_data(ContentsService.get_all_content(), request.user)
+
+    paginator = KeysetPaginator()
+    try:
+        contents, next_cursor = paginator.paginate_request(contents, request)
+    except ValueError:
+        # Поврежденный курсор - показываем первую страницу
+        contents, next_cursor = paginator.paginate(contents)
 
     return render(request, 'ContentApp/content_list.html', {
         'contents': contents,
-        'favorite_ids': favorite_ids
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
     })
 
 
 @login_required
 def favorite_content_view(request):
     """Список избранного контента"""
-    contents = ContentsService.get_favorite_content(request.user)
+    contents = ContentsService.with_listing_data(
+        ContentsService.get_favorite_content(request.user), request.user
+    )
 
     return render(request, 'ContentApp/favorites.html', {
         'contents': contents
@@ -431,10 +439,8 @@ def content_detail_view(request, content_id):
         content=content
     ).exists()
 
-    # Получаем рекомендации
-    engine = RecommendationEngine()
-    engine.get_default_recommendations()
-    similar_content = engine.get_simular_content(content_id, 5)
+    # Похожие товары из предрассчитанной таблицы SimilarContent
+    similar_content = ContentsService.get_similar_content(content.id, 5, request.user)
 
     return render(request, 'ContentApp/content_detail.html', {
         'content': content,
@@ -449,19 +455,12 @@ def content_detail_view(request, content_id):
 @login_required
 def recommendations_view(request):
     """Страница с персональными рекомендациями"""
-    engine = RecommendationEngine()
-
-    try:
-        engine.get_default_recommendations()
-        engine.prepare_user_item_matrix()
-
-        recommendations = engine.recommend_for_user(request.user.id, top_n=12)
-
-        if not recommendations:
-            recommendations = ContentsService.popular_content(12)
+    recommendations = ContentsService.get_user_recommendations(
+        request.user, top_n=12, identity_map=content_identity_map(request)
+    )
 
-    except Exception as e:
-        recommendations = ContentsService.popular_content(12)
+    if not recommendations:
+        recommendations = ContentsService.popular_content(12, request.user)
 
     return render(request, 'ContentApp/recommendations.html', {
         'recommendations': recommendations
@@ -471,8 +470,42 @@ def recommendations_view(request):
 @login_required
 def popular_content_view(request):
     """Страница с популярным контентом"""
-    contents = ContentsService.popular_content(20)
+    contents = ContentsService.popular_content(20, request.user)
 
     return render(request, 'ContentApp/popular.html', {
         'contents': contents
-    })
\ No newline at end of file
+    })
+
+# Async API: источники ленты собираются конкурентно (services/feed.py)
+def serialize_contents(contents):
+    # Товары из FeedService загружены с аннотациями и prefetch - сериализация без запросов к БД
+    return ContentSerializer(contents, many=True).data
+
+
+async def recommendations_async_view(request):
+    """Асинхронный вариант RecommendationsView: персональные рекомендации или популярное"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=status.HTTP_403_FORBIDDEN)
+
+    results, fallbacks = await FeedService.gather(user, ('personal', 'popular'), top_n=10)
+
+    return JsonResponse({
+        'results': serialize_contents(results['personal']),
+        'fallbacks': fallbacks,
+    })
+
+
+async def home_feed_async_view(request):
+    """Лента главной страницы: персональное, популярное и похожие на избранное одним ответом"""
+    user = await request.auser()
+    try:
+        top_n = min(int(request.GET.get('top', 10)), settings.CONTENT_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'top must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results, fallbacks = await FeedService.gather(user, ('personal', 'popular', 'similar'), max(top_n, 1))
+
+    response = {name: serialize_contents(contents) for name, contents in results.items()}
+    response['fallbacks'] = fallbacks
+    return JsonResponse(response)
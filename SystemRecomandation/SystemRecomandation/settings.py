@@ -152,17 +152,110 @@ MESSAGE_TAGS = {
 SESSION_COOKIE_AGE = 1209600  # 2 недели в секундах
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Асинхронная лента (ContentApp/services/feed.py): таймаут каждого источника в секундах;
+# не успевший источник заменяется запасным вариантом, а не задерживает ответ
+FEED_SOURCE_TIMEOUTS = {
+    'personal': 0.5,
+    'popular': 0.3,
+    'similar': 0.3,
+}
+# потоков для ранжирования из кэша и скоринга моделью на лету
+FEED_SCORING_THREADS = 4
+
+# Двухуровневый кэш (ContentApp/utils/cache_backends.py): LRU в памяти каждого
+# процесса перед общим для всех воркеров уровнем. Общий уровень - Redis, если
+# задан REDIS_URL, иначе SQLite-файл на локальном диске
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'ContentApp.utils.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+        }
+    }
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'ContentApp.utils.cache_backends.TieredCache',
+        'LOCATION': 'default',
         'TIMEOUT': 3600,  # 1 час по умолчанию
         'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            # изменения из других воркеров видны в памяти процесса не позже чем через столько секунд
+            'LOCAL_TIMEOUT': 30,
+            # счетчики поколений RecommendationCache меняются на месте - читаются только из общего уровня
+            'SHARED_ONLY_PREFIXES': ['user_recommendations_generation'],
         }
-    }
+    },
+    'shared': {
+        **SHARED_CACHE,
+        'TIMEOUT': 3600,
+    },
 }
 
+# Keyset-пагинация каталога и избранного (utils/pagination.py)
+CONTENT_PAGE_SIZE = 20
+# максимальный page_size, который можно запросить в API
+CONTENT_MAX_PAGE_SIZE = 100
+
+# Рейтинг популярных товаров: байесовское среднее оценок
+# (prior_weight + rating_count) -> (prior_weight * prior_rating + rating_sum) / (prior_weight + rating_count)
+# плюс favorite_weight * ln(1 + число добавлений в избранное)
+POPULARITY_PRIOR_RATING = 3.0
+# сколько "виртуальных" оценок prior_rating у каждого товара
+POPULARITY_PRIOR_WEIGHT = 10
+POPULARITY_FAVORITE_WEIGHT = 0.5
+
+# Рекомендательная система
+# Движок из реестра ContentApp.services.backends: 'keras' (нейросеть) или 'als'
+RECOMMENDATION_BACKEND = 'keras'
+# Каталог с версионированными снимками обученной модели
+RECOMMENDATION_MODEL_DIR = os.path.join(BASE_DIR, 'recommendation_models')
+# Сколько последних версий модели хранить на диске
+RECOMMENDATION_MODEL_KEEP = 3
+# Сколько рекомендаций на пользователя хранить в таблице UserRecommendation
+RECOMMENDATION_TOP_N = 20
+# TTL записей кэша рекомендаций, в секундах (utils/recommendation_cache.py)
+RECOMMENDATION_CACHE_TIMEOUT = 15 * 60
+# Фоновое переобучение (manage.py retrain_recommendations):
+# сколько изменений Favorite/Rating/CategoryContent запускают переобучение
+RECOMMENDATION_RETRAIN_THRESHOLD = 100
+# максимальный возраст модели в секундах
+RECOMMENDATION_RETRAIN_MAX_AGE = 24 * 60 * 60
+# как часто проверять изменения, в секундах
+RECOMMENDATION_RETRAIN_INTERVAL = 60
+# Индекс похожих товаров: сколько соседей хранить для каждого товара
+RECOMMENDATION_SIMILARITY_TOP_K = 50
+# сколько строк матрицы близости считать за раз (ограничивает пиковую память)
+RECOMMENDATION_SIMILARITY_BLOCK_SIZE = 1024
+# Сколько похожих товаров хранить в таблице SimilarContent
+RECOMMENDATION_SIMILAR_TOP_N = 10
+# Применять изменения Content к индексу похожих товаров между переобучениями
+# (пачкой, на каждой проверке воркера retrain_recommendations)
+RECOMMENDATION_INCREMENTAL_SIMILARITY = True
+# Отбор кандидатов по эмбеддингам товаров (IVF): сколько кандидатов скорить моделью
+RECOMMENDATION_ANN_CANDIDATES = 300
+# сколько кластеров просматривать на запрос - ручка полнота/задержка
+RECOMMENDATION_ANN_PROBES = 8
+# число кластеров, None - sqrt(числа товаров)
+RECOMMENDATION_ANN_LISTS = None
+# Матричная факторизация ALS по неявным сигналам (services/als.py)
+RECOMMENDATION_ALS_FACTORS = 64
+RECOMMENDATION_ALS_ITERATIONS = 15
+RECOMMENDATION_ALS_REGULARIZATION = 0.1
+# уверенность c = 1 + alpha * сила сигнала
+RECOMMENDATION_ALS_ALPHA = 40.0
+# потоков для решения систем, None - по числу ядер
+RECOMMENDATION_ALS_THREADS = None
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
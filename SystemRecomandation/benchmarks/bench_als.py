@@ -0,0 +1,84 @@
+"""
+Бенчмарк обучения и выдачи ALSRecommendationEngine против Keras-модели RecommendationEngine.
+
+Обе модели обучаются на одной случайной матрице взаимодействий со степенной
+популярностью товаров; Keras - заданное число эпох (если установлен TensorFlow).
+Выдача сравнивает скоринг всего каталога для одного пользователя.
+
+Запуск из каталога SystemRecomandation:
+    python benchmarks/bench_als.py --users 20000 --items 20000 --interactions 500000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Добавляем путь к проекту в Python path
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_path)
+
+from ContentApp.services.django_setap import configure_django
+
+configure_django()
+
+from ContentApp.services.als import ALSRecommendationEngine
+from ContentApp.services.matrix_builder import UserItemMatrixBuilder
+from ContentApp.services.recomendation import RecommendationEngine
+from bench_training_triples import make_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20_000)
+    parser.add_argument('--items', type=int, default=20_000)
+    parser.add_argument('--interactions', type=int, default=500_000)
+    parser.add_argument('--factors', type=int, default=64)
+    parser.add_argument('--iterations', type=int, default=15)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--keras-epochs', type=int, default=5, help="0 - не обучать Keras-модель")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    matrix = make_matrix(args.users, args.items, args.interactions, args.seed)
+    print(f"Матрица {matrix.shape[0]} x {matrix.shape[1]}, взаимодействий: {matrix.nnz}")
+
+    als = ALSRecommendationEngine(factors=args.factors, iterations=args.iterations, threads=args.threads)
+    als.user_item_matrix = matrix
+    start = time.perf_counter()
+    als.train()
+    als_time = time.perf_counter() - start
+    print(f"ALS: {args.iterations} итераций, {als.threads} потоков - {als_time:.1f} с")
+
+    start = time.perf_counter()
+    for user_idx in range(100):
+        scores = als.item_factors @ als.user_factors[user_idx]
+        np.argpartition(-scores, 10)[:10]
+    print(f"ALS выдача: {(time.perf_counter() - start) * 10:.2f} мс на пользователя")
+
+    if args.keras_epochs <= 0:
+        return
+
+    try:
+        import tensorflow  # noqa: F401
+    except ImportError:
+        print("TensorFlow не установлен, Keras-модель пропущена")
+        return
+
+    engine = RecommendationEngine()
+    user_ids, content_ids, ratings = UserItemMatrixBuilder.training_triples(matrix)
+    engine.build_deep_learning_model(num_users=args.users, num_contents=args.items)
+
+    start = time.perf_counter()
+    engine.deep_model.fit(
+        x=[user_ids, content_ids], y=ratings / 10,
+        batch_size=64, epochs=args.keras_epochs, validation_split=0.2, verbose=0,
+    )
+    keras_time = time.perf_counter() - start
+    print(f"Keras: {args.keras_epochs} эпох - {keras_time:.1f} с "
+          f"(ALS быстрее в {keras_time / als_time:.1f} раз)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Поэтапный бенчмарк рекомендательного конвейера на синтетических данных.
+
+Для каждого размера данных создается временная SQLite база, заполняется
+SyntheticDataGenerator, и по отдельности замеряются этапы: загрузка признаков,
+обучение TF-IDF, построение индекса похожих товаров, сборка user-item матрицы,
+обучение модели, рекомендация одному пользователю, поиск похожих товаров и
+загрузка товаров из БД (гидратация). Для каждого этапа печатаются время,
+пиковая память Python-аллокаций (tracemalloc, без памяти TensorFlow) и число SQL-запросов.
+
+Результаты можно сохранить как базовые (--save-baseline) и сравнивать с ними
+(--compare): этапы, ставшие медленнее больше чем на --threshold, или с большим
+числом запросов считаются регрессией, и скрипт завершается с кодом 1.
+
+Запуск из каталога SystemRecomandation:
+    python benchmarks/bench_pipeline.py --sizes small,medium --save-baseline
+    python benchmarks/bench_pipeline.py --sizes small,medium --compare
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Добавляем путь к проекту в Python path
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_path)
+
+DEFAULT_BASELINE = os.path.join(project_path, 'benchmarks', 'results', 'pipeline_baseline.json')
+
+# users, contents, interactions
+SIZES = {
+    'small': (500, 1000, 20_000),
+    'medium': (5_000, 10_000, 200_000),
+    'large': (20_000, 20_000, 1_000_000),
+}
+
+
+def setup_django(workdir):
+    """Настраивает Django на временную базу и каталог моделей до первого подключения"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SystemRecomandation.settings')
+
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'bench.sqlite3'),
+    }
+    settings.RECOMMENDATION_MODEL_DIR = os.path.join(workdir, 'models')
+    django.setup()
+
+
+def measure(stage, results, func, *args, repeat=1):
+    """Выполняет func repeat раз и записывает среднее время, пиковую память и число запросов"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func(*args)
+        elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results[stage] = {
+        'time_ms': elapsed / repeat * 1000,
+        'peak_mb': peak / 2 ** 20,
+        'queries': len(queries) / repeat,
+    }
+    return result
+
+
+def run_size(name, backend_name, epochs, samples, seed):
+    from django.core.management import call_command
+    from django.db import connection
+
+    from ContentApp.services.backends import get_backend
+    from ContentApp.services.data_get import ContentsService
+    from ContentApp.services.similarity import SimilarityIndex
+    from ContentApp.services.synthetic_data import SyntheticDataGenerator
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    users, contents, interactions = SIZES[name]
+
+    # Каждый размер - в чистой базе
+    connection.close()
+    db_path = connection.settings_dict['NAME']
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    call_command('migrate', verbosity=0)
+
+    start = time.perf_counter()
+    SyntheticDataGenerator(users=users, contents=contents, interactions=interactions, seed=seed).generate()
+    print(f"\n[{backend_name}/{name}] {users} пользователей, {contents} товаров, {interactions} взаимодействий "
+          f"(генерация {time.perf_counter() - start:.0f} с)")
+
+    results = {}
+    engine = get_backend(backend_name)()
+
+    features = measure('features', results, ContentsService.get_content_features)
+    texts = [
+        engine.content_text(title, summary, author)
+        for title, summary, author in zip(features['title'], features['summary'], features['author'])
+    ]
+
+    vectorizer = TfidfVectorizer(stop_words='english')
+    tfidf_matrix = measure('tfidf', results, vectorizer.fit_transform, texts)
+
+    engine.tfidf_vectorizer = vectorizer
+    engine.content_features = dict(zip(features['id'], features['rating']))
+    engine.similarity_index = measure(
+        'similarity', results, SimilarityIndex.build, np.array(features['id']), tfidf_matrix
+    )
+
+    measure('matrix', results, engine.prepare_user_item_matrix)
+
+    # Обучение без повторной загрузки признаков, которую делает fit()
+    if backend_name == 'keras':
+        measure('training', results, engine.train_deep_model, epochs, 256)
+    else:
+        measure('training', results, engine.train)
+
+    rng = np.random.default_rng(seed)
+    sample_users = rng.choice(engine.user_ids, size=min(samples, len(engine.user_ids)), replace=False)
+    sample_contents = rng.choice(features['id'], size=min(samples, len(features['id'])), replace=False)
+
+    def recommend_sample():
+        return [engine.recommend(int(user_id), 10) for user_id in sample_users]
+
+    def similar_sample():
+        return [engine.similar(int(content_id), 10) for content_id in sample_contents]
+
+    recommended = measure('recommend', results, recommend_sample)
+    measure('similar', results, similar_sample)
+
+    recommended = [ids for ids, _ in filter(None, recommended) if ids]
+
+    def hydrate_sample():
+        return [list(ContentsService.rec_content(ids)) for ids in recommended]
+
+    measure('hydration', results, hydrate_sample)
+
+    # Этапы выдачи меряются пачкой запросов, в отчет идет время на один запрос
+    for stage, count in (('recommend', len(sample_users)),
+                         ('similar', len(sample_contents)),
+                         ('hydration', len(recommended))):
+        for key in ('time_ms', 'queries'):
+            results[stage][key] /= max(count, 1)
+
+    return results
+
+
+def print_results(name, results, baseline, threshold):
+    """Печатает таблицу этапов и возвращает список регрессий относительно baseline"""
+    regressions = []
+    print(f"{'этап':<12}{'время, мс':>12}{'память, МБ':>12}{'запросов':>10}  сравнение")
+    for stage, row in results.items():
+        note = ''
+        base = (baseline or {}).get(stage)
+        if base:
+            ratio = row['time_ms'] / base['time_ms'] if base['time_ms'] else 1.0
+            note = f"{ratio:.2f}x"
+            if ratio > 1 + threshold:
+                regressions.append(f"{name}/{stage}: время {base['time_ms']:.1f} -> {row['time_ms']:.1f} мс")
+                note += ' РЕГРЕССИЯ'
+            if row['queries'] > base['queries']:
+                regressions.append(f"{name}/{stage}: запросов {base['queries']:g} -> {row['queries']:g}")
+                note += ' +запросы'
+        print(f"{stage:<12}{row['time_ms']:>12.2f}{row['peak_mb']:>12.1f}{row['queries']:>10g}  {note}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='small', help=f"Через запятую из: {', '.join(SIZES)}")
+    parser.add_argument('--backend', default=None, help="Движок, по умолчанию settings.RECOMMENDATION_BACKEND")
+    parser.add_argument('--epochs', type=int, default=1, help="Эпох обучения Keras-модели")
+    parser.add_argument('--samples', type=int, default=100, help="Сколько пользователей/товаров в замерах выдачи")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help="Допустимое замедление, доля")
+    parser.add_argument('--workdir', default=None, help="Каталог для временной базы (по умолчанию tempdir)")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"Неизвестные размеры: {', '.join(sorted(unknown))}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_pipeline_')
+    setup_django(workdir)
+
+    from django.conf import settings
+    backend_name = args.backend or settings.RECOMMENDATION_BACKEND
+
+    baseline = {}
+    if args.compare:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = {}
+    regressions = []
+    try:
+        for name in sizes:
+            # Базовые результаты разных движков не сравниваются между собой
+            key = f'{backend_name}/{name}'
+            report[key] = run_size(name, backend_name, args.epochs, args.samples, args.seed)
+            regressions += print_results(key, report[key], baseline.get(key), args.threshold)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nБазовые результаты сохранены в {args.baseline}")
+
+    if regressions:
+        print("\nРегрессии:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
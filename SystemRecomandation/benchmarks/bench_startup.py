@@ -0,0 +1,90 @@
+"""
+Бенчмарк холодного старта веб-воркера.
+
+Каждый прогон запускает новый интерпретатор, импортирует WSGI-приложение
+(то же, что делают gunicorn/uwsgi и runserver при перезапуске) и обрабатывает
+первый запрос. Печатает время импорта, время первого ответа, пиковую память
+процесса и тяжелые библиотеки, оказавшиеся загруженными.
+
+Запуск из каталога SystemRecomandation:
+    python benchmarks/bench_startup.py --path /api/popular/ --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('tensorflow', 'pandas', 'sklearn', 'scipy', 'joblib', 'numpy')
+
+# Код дочернего процесса: все замеры делаются внутри, наружу - одна строка JSON
+CHILD = """
+import io, json, resource, sys, time
+
+start = time.perf_counter()
+from SystemRecomandation.wsgi import application
+imported = time.perf_counter()
+
+environ = {
+    'REQUEST_METHOD': 'GET',
+    'PATH_INFO': PATH,
+    'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80',
+    'HTTP_HOST': 'localhost',
+    'REMOTE_ADDR': '127.0.0.1',
+    'wsgi.url_scheme': 'http',
+    'wsgi.input': io.BytesIO(),
+    'wsgi.errors': sys.stderr,
+}
+statuses = []
+body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b''.join(body)
+responded = time.perf_counter()
+
+print(json.dumps({
+    'import': imported - start,
+    'first_request': responded - imported,
+    'status': statuses[0],
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+
+def run_once(path, settings_module):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [project_path, env.get('PYTHONPATH')]))
+
+    code = f"PATH = {path!r}\nHEAVY = {HEAVY_MODULES!r}\n" + CHILD
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=project_path, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/popular/', help="URL первого запроса")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--settings', default='SystemRecomandation.settings')
+    args = parser.parse_args()
+
+    runs = [run_once(args.path, args.settings) for _ in range(args.repeat)]
+
+    print(f"Прогонов: {len(runs)}, запрос GET {args.path} -> {runs[-1]['status']}")
+    for key, title in (('import', 'импорт WSGI-приложения'), ('first_request', 'первый запрос')):
+        values = [run[key] * 1000 for run in runs]
+        print(f"{title}: медиана {statistics.median(values):.0f} мс, "
+              f"мин {min(values):.0f} мс, макс {max(values):.0f} мс")
+    print(f"пиковая память: {statistics.median(run['max_rss_mb'] for run in runs):.0f} МБ")
+    print(f"загружены тяжелые библиотеки: {', '.join(runs[-1]['modules']) or 'нет'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Бенчмарк подготовки обучающих данных для RecommendationEngine.train_deep_model.
+
+Сравнивает векторизованное извлечение троек из разреженной матрицы
+(UserItemMatrixBuilder.training_triples) со старым циклом по всем ячейкам
+users x items через DataFrame.iloc. Старый цикл слишком медленный для полного
+размера, поэтому он меряется на нескольких пользователях и экстраполируется.
+
+Запуск из каталога SystemRecomandation:
+    python benchmarks/bench_training_triples.py --users 10000 --items 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+# Добавляем путь к проекту в Python path
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_path)
+
+from ContentApp.services.django_setap import configure_django
+
+configure_django()
+
+from ContentApp.services.matrix_builder import UserItemMatrixBuilder
+
+
+def make_matrix(users, items, interactions, seed):
+    """Случайная user-item матрица со степенной популярностью товаров"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, items + 1)
+    popularity /= popularity.sum()
+
+    rows = rng.integers(0, users, size=interactions)
+    cols = rng.choice(items, size=interactions, p=popularity)
+    data = rng.uniform(0.6, 5.0, size=interactions).astype(np.float32)
+
+    matrix = csr_matrix((data, (rows, cols)), shape=(users, items), dtype=np.float32)
+    matrix.sum_duplicates()
+    return matrix
+
+
+def legacy_loop(frame):
+    """Старый вариант из train_deep_model: проход по каждой ячейке через iloc"""
+    user_ids, content_ids, ratings = [], [], []
+    for user_idx in range(len(frame.index)):
+        for content_idx in range(len(frame.columns)):
+            rating = frame.iloc[user_idx, content_idx]
+            if rating > 0:
+                user_ids.append(user_idx)
+                content_ids.append(content_idx)
+                ratings.append(rating)
+    return np.array(user_ids), np.array(content_ids), np.array(ratings)
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--items', type=int, default=50_000)
+    parser.add_argument('--interactions', type=int, default=1_000_000)
+    parser.add_argument('--legacy-users', type=int, default=2,
+                        help="Сколько строк прогнать старым циклом для экстраполяции")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    matrix = make_matrix(args.users, args.items, args.interactions, args.seed)
+    print(f"Матрица {matrix.shape[0]} x {matrix.shape[1]}, взаимодействий: {matrix.nnz}")
+
+    vectorized_time, (user_ids, content_ids, ratings) = best_of(
+        args.repeat, UserItemMatrixBuilder.training_triples, matrix
+    )
+    print(f"training_triples:  {vectorized_time * 1000:.1f} мс, троек: {len(ratings)}")
+
+    if args.legacy_users > 0:
+        sample = pd.DataFrame(matrix[:args.legacy_users].toarray())
+        legacy_time, legacy = best_of(1, legacy_loop, sample)
+
+        expected_rows = user_ids < args.legacy_users
+        assert np.array_equal(legacy[1], content_ids[expected_rows]), "результаты расходятся"
+
+        per_cell = legacy_time / sample.size
+        estimate = per_cell * args.users * args.items
+        print(f"цикл по ячейкам: {per_cell * 1e6:.2f} мкс/ячейку, "
+              f"оценка для полной матрицы: {estimate:.0f} с "
+              f"(в {estimate / vectorized_time:.0f} раз медленнее)")
+
+
+if __name__ == '__main__':
+    main()